@@ -14,6 +14,7 @@ import pytest
 import structlog
 from close_utils import make_close_request
 from config import env_type
+from utils.easypost import format_delivery_date_readable, parse_tracking_datetime
 from utils.email import send_email
 
 
@@ -106,7 +107,8 @@ from blueprints.gmail import gmail_bp  # noqa: E402
 # Middleware to add request ID to each request
 @flask_app.before_request
 def add_request_id():
-    request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
+    # Heroku sets X-Request-ID, so only mint a UUID when it is missing
+    request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
     g.request_id = request_id
     # Store request start time for duration calculation
     g.start_time = time.time()
@@ -165,7 +167,7 @@ def handle_exception(e):
     current_route = request.path
 
     # Get the request ID which serves as a run ID
-    run_id = getattr(g, "request_id", str(uuid.uuid4()))
+    run_id = g.get("request_id") or str(uuid.uuid4())
 
     # Extract the calling function name from the traceback
     calling_function = "Unknown"
@@ -346,12 +348,10 @@ def parse_delivery_information(tracking_data):
         "tracking_location"
     ]["state"].upper()
 
-    delivery_datetime = datetime.strptime(
-        delivery_tracking_data["datetime"], "%Y-%m-%dT%H:%M:%SZ"
-    )
+    delivery_datetime = parse_tracking_datetime(delivery_tracking_data["datetime"])
     delivery_information["delivery_date"] = delivery_datetime.date()
-    delivery_information["delivery_date_readable"] = delivery_datetime.strftime(
-        "%a %-m/%-d"
+    delivery_information["delivery_date_readable"] = format_delivery_date_readable(
+        delivery_datetime
     )
     delivery_information["date_and_location_of_mailer_delivered"] = (
         f"{delivery_information['delivery_date_readable']} to {delivery_information['delivery_city']}, {delivery_information['delivery_state']}"
@@ -365,12 +365,6 @@ def parse_delivery_information(tracking_data):
 
 
 def update_delivery_information_for_lead(lead_id, delivery_information):
-    def verify_delivery_information_updated(response_data, lead_update_data):
-        for key, value in lead_update_data.items():
-            if key not in response_data or response_data[key] != value:
-                return False
-        return True
-
     custom_field_ids = {
         "date_and_location_of_mailer_delivered": {
             "type": "text",
@@ -429,7 +423,7 @@ def update_delivery_information_for_lead(lead_id, delivery_information):
         json=lead_update_data,
     )
     response_data = response.json()
-    data_updated = verify_delivery_information_updated(response_data, lead_update_data)
+    data_updated = lead_update_data.items() <= response_data.items()
     if not data_updated:
         error_message = f"Delivery information update failed for lead {lead_id}."
         logger.error(error_message)
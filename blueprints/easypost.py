@@ -32,7 +32,7 @@ def create_easypost_tracker():
         }
         return jsonify(response_data), 400
 
-    g_run_id = getattr(g, "request_id", str(uuid.uuid4()))
+    g_run_id = g.get("request_id") or str(uuid.uuid4())
     logger.info(
         "create_tracker_temporal_enqueue",
         run_id=g_run_id,
@@ -110,7 +110,7 @@ def handle_package_delivery_update():
             }
         ), 200
 
-    g_run_id = getattr(g, "request_id", str(uuid.uuid4()))
+    g_run_id = g.get("request_id") or str(uuid.uuid4())
     logger.info(
         "create_tracker_temporal_enqueue",
         run_id=g_run_id,
@@ -8,6 +8,7 @@ import os
 import json
 import traceback
 import base64
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import structlog
@@ -31,6 +32,11 @@ DEFAULT_SENDER = "lance@whiteboardgeeks.com"  # Default sender email address
 # Webhook authentication
 GMAIL_WEBHOOK_PASSWORD = os.environ.get("GMAIL_WEBHOOK_PASSWORD")
 
+# Service account credentials per impersonated user. Reusing them keeps the
+# OAuth access token between emails; google-auth refreshes it when it expires.
+_credentials_by_user = {}
+_credentials_lock = threading.Lock()
+
 
 def get_service_account_credentials(impersonate_user=DEFAULT_SENDER):
     """
@@ -88,6 +94,31 @@ def get_service_account_credentials(impersonate_user=DEFAULT_SENDER):
         return None
 
 
+def get_cached_service_account_credentials(impersonate_user=DEFAULT_SENDER):
+    """
+    Get service account credentials, reusing earlier ones for the same user.
+
+    Failed loads are not cached, so fixed configuration is picked up on the
+    next call.
+
+    Args:
+        impersonate_user (str): Email of the user to impersonate
+
+    Returns:
+        Credentials object for the service account
+    """
+    with _credentials_lock:
+        credentials = _credentials_by_user.get(impersonate_user)
+    if credentials is not None:
+        return credentials
+
+    credentials = get_service_account_credentials(impersonate_user)
+    if credentials:
+        with _credentials_lock:
+            credentials = _credentials_by_user.setdefault(impersonate_user, credentials)
+    return credentials
+
+
 def create_gmail_service(impersonate_user=DEFAULT_SENDER):
     """
     Create Gmail API service.
@@ -99,7 +130,7 @@ def create_gmail_service(impersonate_user=DEFAULT_SENDER):
         Gmail API service object or None if error
     """
     try:
-        credentials = get_service_account_credentials(impersonate_user)
+        credentials = get_cached_service_account_credentials(impersonate_user)
         if not credentials:
             return None
 
@@ -456,7 +487,7 @@ def send_email_endpoint():
 
     except Exception as e:
         # Get request ID which serves as run ID
-        run_id = getattr(g, "request_id", str(uuid.uuid4()))
+        run_id = g.get("request_id") or str(uuid.uuid4())
 
         # Extract calling function name
         calling_function = "send_email_endpoint"
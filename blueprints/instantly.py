@@ -210,7 +210,7 @@ def add_lead_to_instantly():
         logger.error("invalid_json_payload", route="/instantly/add_lead")
         return jsonify({"status": "error", "message": error_msg}), 400
 
-    g_run_id = getattr(g, "request_id", str(uuid.uuid4()))
+    g_run_id = g.get("request_id") or str(uuid.uuid4())
 
     try:
         workflow_input = WebhookAddLeadPayload(json_payload=json_payload)
@@ -429,7 +429,7 @@ def list_instantly_campaigns():
 @instantly_bp.route("/email_sent", methods=["POST"])
 def handle_instantly_email_sent():
     """Handle webhooks from Instantly when an email is sent."""
-    g_run_id = getattr(g, "request_id", str(uuid.uuid4()))
+    g_run_id = g.get("request_id") or str(uuid.uuid4())
 
     input = WebhookEmailSentPayload(
         json_payload=request.get_json(),
@@ -461,7 +461,7 @@ def handle_instantly_reply_received_temporal():
         }
         return log_webhook_response(400, response_data, None)
 
-    g_run_id = getattr(g, "request_id", str(uuid.uuid4()))
+    g_run_id = g.get("request_id") or str(uuid.uuid4())
 
     logger.info(
         "reply_received_temporal_enqueue",
@@ -4,13 +4,20 @@ Utility functions for interacting with Close CRM.
 
 import logging
 import os
+import threading
 import traceback
 from base64 import b64encode
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import date
 from time import sleep
+import copy
 import json
 import functools
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from utils.rate_limiter import CloseRateLimiter
 
 # Configure logging
@@ -19,47 +26,118 @@ logger = logging.getLogger(__name__)
 # Get API key from environment
 CLOSE_API_KEY = os.environ.get("CLOSE_API_KEY")
 CLOSE_ENCODED_KEY = b64encode(f"{CLOSE_API_KEY}:".encode()).decode()
+_CLOSE_HEADERS = {
+    "Content-Type": "application/json",
+    "Authorization": f"Basic {CLOSE_ENCODED_KEY}",
+}
+
+
+@dataclass(slots=True, frozen=True)
+class DeliveryInformation:
+    """Delivery details parsed from an EasyPost tracking update."""
+
+    delivery_date: date
+    delivery_city: str
+    delivery_state: str
+    location_delivered: str
+    date_and_location_of_mailer_delivered: str
+    delivery_date_readable: str
+
+
+# Lead custom fields written when a package is delivered, as
+# (custom field ID, DeliveryInformation attribute, value transform).
+_DELIVERY_FIELDS = (
+    (
+        "custom.cf_DTgmXXPozUH3707H1MYu2PhhDznJjWbtmDcb7zme5a9",
+        "date_and_location_of_mailer_delivered",
+        str,
+    ),
+    ("custom.cf_vxfsYfTrFk6oYrnSx0ViYrUMpE7y5sxi0NnRgTyOf30", "delivery_state", str),
+    ("custom.cf_1hWUFxiA6QhUXrYT3lDh96JSWKxVBBAKCB3XO8EXGUW", "delivery_city", str),
+    (
+        "custom.cf_jVU4YFLX5bDq2dRjvBapPYAJxGP0iQWid9QC7cQjSCR",
+        "delivery_date",
+        date.isoformat,
+    ),
+    (
+        "custom.cf_jGC3O9doWfvwFV49NBIRGwA0PFIcKMzE0h8Zf65XLCQ",
+        "delivery_date_readable",
+        str,
+    ),
+    (
+        "custom.cf_hPAtbaFuztYBQcYVqsk4pIFV0hKvnlb696TknlzEERS",
+        "location_delivered",
+        str,
+    ),
+)
+_PACKAGE_DELIVERED_FIELD_ID = "custom.cf_wkZ5ptOR1Ro3YPxJPYipI35M7ticuYvJHFgp2y4fzdQ"
+
+# Largest page size accepted by the Close search endpoint
+CLOSE_SEARCH_PAGE_SIZE = 200
 
 # Initialize global Close rate limiter
 _close_rate_limiter = None
 
+# Keep-alive connection pool to Close shared by all threads, sized to cover the
+# Temporal worker's activity thread pool
+_close_session = requests.Session()
+_close_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=20))
+# Auth and content type are sent on every request; requests merges any
+# per-call headers on top of these
+_close_session.headers.update(_CLOSE_HEADERS)
+
+# GET requests currently in flight, keyed by URL and sorted query params
+_inflight_gets: dict[tuple[str, tuple], Future] = {}
+_inflight_gets_lock = threading.Lock()
+
 
 def get_close_rate_limiter():
     """
     Get or create the global Close rate limiter instance.
 
+    Returns:
+        CloseRateLimiter: Global rate limiter instance
+    """
+    if _close_rate_limiter is not None:
+        return _close_rate_limiter
+    return _init_close_rate_limiter()
+
+
+def _init_close_rate_limiter():
+    """
+    Create the global Close rate limiter, preferring Redis and falling back
+    to an in-memory limiter when Redis is unreachable.
+
     Returns:
         CloseRateLimiter: Global rate limiter instance
     """
     global _close_rate_limiter
-    if _close_rate_limiter is None:
-        try:
-            import redis
-            import os
-
-            # Try to connect to Redis
-            redis_url = os.environ.get("REDISCLOUD_URL", "redis://localhost:6379/0")
-            redis_client = redis.from_url(redis_url)
-            redis_client.ping()  # Test connection
-
-            _close_rate_limiter = CloseRateLimiter(
-                redis_client=redis_client,
-                conservative_default_rps=1.0,  # Conservative 1 req/sec for unknown endpoints
-                safety_factor=0.8,  # 80% safety margin
-                cache_expiration_seconds=3600,  # 1 hour cache
-            )
-            logger.info("Close rate limiter initialized with Redis")
-
-        except Exception as e:
-            logger.warning(f"Failed to initialize Redis for Close rate limiter: {e}")
-            # Fallback to in-memory rate limiter
-            _close_rate_limiter = CloseRateLimiter(
-                redis_client=None,
-                conservative_default_rps=1.0,
-                safety_factor=0.8,
-                fallback_on_redis_error=True,
-            )
-            logger.info("Close rate limiter initialized with in-memory fallback")
+    try:
+        import redis
+
+        # Try to connect to Redis
+        redis_url = os.environ.get("REDISCLOUD_URL", "redis://localhost:6379/0")
+        redis_client = redis.from_url(redis_url)
+        redis_client.ping()  # Test connection
+
+        _close_rate_limiter = CloseRateLimiter(
+            redis_client=redis_client,
+            conservative_default_rps=1.0,  # Conservative 1 req/sec for unknown endpoints
+            safety_factor=0.8,  # 80% safety margin
+            cache_expiration_seconds=3600,  # 1 hour cache
+        )
+        logger.info("Close rate limiter initialized with Redis")
+
+    except Exception as e:
+        logger.warning(f"Failed to initialize Redis for Close rate limiter: {e}")
+        # Fallback to in-memory rate limiter
+        _close_rate_limiter = CloseRateLimiter(
+            redis_client=None,
+            conservative_default_rps=1.0,
+            safety_factor=0.8,
+            fallback_on_redis_error=True,
+        )
+        logger.info("Close rate limiter initialized with in-memory fallback")
 
     return _close_rate_limiter
 
@@ -92,14 +170,17 @@ def close_rate_limit(max_retries=3, initial_delay=1):
             elif "url" in kwargs:
                 url = kwargs["url"]
 
-            rate_limiter = get_close_rate_limiter()
+            # Only Close endpoints are rate limited, so non-Close calls never
+            # touch (or lazily create) the shared limiter.
+            is_close_url = bool(url) and url.startswith("https://api.close.com")
+            rate_limiter = get_close_rate_limiter() if is_close_url else None
             delay = initial_delay
             last_exception = None
 
             for attempt in range(max_retries + 1):
                 try:
                     # Apply rate limiting before making the request
-                    if url and url.startswith("https://api.close.com"):
+                    if is_close_url:
                         if not rate_limiter.acquire_token_for_endpoint(url):
                             logger.warning(f"Rate limited for endpoint: {url}")
                             # Wait a bit and try again (this counts as an attempt)
@@ -116,11 +197,7 @@ def close_rate_limit(max_retries=3, initial_delay=1):
                     response = func(*args, **kwargs)
 
                     # Parse rate limit headers from response to learn actual limits
-                    if (
-                        url
-                        and url.startswith("https://api.close.com")
-                        and hasattr(response, "headers")
-                    ):
+                    if is_close_url and hasattr(response, "headers"):
                         rate_limiter.update_from_response_headers(url, response)
 
                     return response
@@ -157,6 +234,17 @@ def close_rate_limit(max_retries=3, initial_delay=1):
     return decorator
 
 
+@functools.lru_cache(maxsize=None)
+def _read_query_file(file_name):
+    """Read the raw text of a close_queries JSON file once per process."""
+    # Construct the full path to the file
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    file_path = os.path.join(base_dir, "close_queries", file_name)
+
+    with open(file_path, "r") as file:
+        return file.read()
+
+
 def load_query(file_name):
     """
     Load a Close query from a JSON file in the close_queries directory.
@@ -165,15 +253,10 @@ def load_query(file_name):
         file_name (str): Name of the JSON file to load
 
     Returns:
-        dict: The loaded query as a dictionary
+        dict: The loaded query as a dictionary. Each call parses a fresh copy,
+        so callers may fill in values without affecting later calls.
     """
-    # Construct the full path to the file
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path = os.path.join(base_dir, "close_queries", file_name)
-
-    # Open and load the JSON data
-    with open(file_path, "r") as file:
-        return json.load(file)
+    return json.loads(_read_query_file(file_name))
 
 
 def retry_with_backoff(max_retries=3, initial_delay=1):
@@ -199,6 +282,16 @@ def retry_with_backoff(max_retries=3, initial_delay=1):
                     return func(*args, **kwargs)
                 except requests.exceptions.RequestException as e:
                     last_exception = e
+
+                    # Don't retry on 4xx errors (except 429 rate limit)
+                    if hasattr(e, "response") and e.response is not None:
+                        status_code = e.response.status_code
+                        if 400 <= status_code < 500 and status_code != 429:
+                            logger.error(
+                                f"Client error {status_code} for {func.__name__}: {str(e)}"
+                            )
+                            raise last_exception
+
                     if attempt == max_retries:
                         logger.error(
                             f"Max retries ({max_retries}) exceeded for {func.__name__}: {str(e)}"
@@ -224,14 +317,85 @@ def get_close_headers():
     Returns headers needed for Close API requests.
 
     Returns:
-        dict: Headers with Content-Type and Authorization.
+        dict: Headers with Content-Type and Authorization. A fresh copy is
+        returned on every call, so callers may update it.
     """
-    return {
-        "Content-Type": "application/json",
-        "Authorization": f"Basic {CLOSE_ENCODED_KEY}",
-    }
+    return _CLOSE_HEADERS.copy()
+
+
+def coalesce_concurrent_gets(func):
+    """
+    Decorator that collapses identical concurrent GET requests into one.
+
+    While a plain GET (only params and timeout) for a URL and params is in
+    flight, other threads asking for the same resource wait for it and each
+    receive their own copy of its response. If that request fails, the
+    waiting threads send their own instead of sharing its exception. Other
+    requests pass straight through.
+
+    Args:
+        func (function): Request function taking (method, url, **kwargs)
+
+    Returns:
+        function: Decorated function with GET coalescing
+    """
+
+    @functools.wraps(func)
+    def wrapper(method, url, **kwargs):
+        key = _coalesce_key(method, url, kwargs)
+        if key is None:
+            return func(method, url, **kwargs)
+
+        with _inflight_gets_lock:
+            future = _inflight_gets.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                _inflight_gets[key] = future
+
+        if not is_leader:
+            try:
+                return _copy_response(future.result())
+            except Exception:
+                return func(method, url, **kwargs)
+
+        try:
+            response = func(method, url, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            with _inflight_gets_lock:
+                _inflight_gets.pop(key, None)
+
+    return wrapper
+
+
+def _coalesce_key(method, url, kwargs):
+    """Key for a GET that may share a response, or None if it may not."""
+    if method.lower() != "get" or not kwargs.keys() <= {"params", "timeout"}:
+        return None
+    params = kwargs.get("params") or {}
+    if not isinstance(params, dict):
+        return None
+    return url, tuple(sorted((str(k), str(v)) for k, v in params.items()))
+
+
+def _copy_response(response):
+    """Copy a response so threads sharing it cannot affect each other."""
+    if not isinstance(response, requests.Response):
+        return copy.deepcopy(response)
+    # Pickle-style copy: carries the read body over and leaves raw unset
+    response_copy = copy.copy(response)
+    response_copy.headers = response.headers.copy()
+    response_copy.cookies = response.cookies.copy()
+    return response_copy
 
 
+@coalesce_concurrent_gets
 @close_rate_limit(max_retries=3, initial_delay=1)
 def make_close_request(method, url, **kwargs):
     """
@@ -251,12 +415,7 @@ def make_close_request(method, url, **kwargs):
     Returns:
         requests.Response: The response from the Close API
     """
-    headers = get_close_headers()
-    if "headers" in kwargs:
-        headers.update(kwargs["headers"])
-    kwargs["headers"] = headers
-
-    response = requests.request(method, url, **kwargs)
+    response = _close_session.request(method, url, **kwargs)
     response.raise_for_status()
     return response
 
@@ -271,21 +430,77 @@ def create_email_search_query(email):
     Returns:
         dict: The Close API query.
     """
-    # Load the query template
-    query_path = os.path.join(
-        os.path.dirname(__file__),
-        "close_queries",
-        "leads_with_contact_with_email.json",
+    # Substitute the email placeholder in the template text, so each call is a
+    # single parse with no nested lookups or copying of the template.
+    return json.loads(
+        _read_query_file("leads_with_contact_with_email.json").replace(
+            '"email_goes_here"', json.dumps(email), 1
+        )
     )
-    with open(query_path, "r") as f:
-        query_template = json.load(f)
 
-    # Replace the email value in the query
-    query_template["query"]["queries"][1]["queries"][0]["related_query"]["queries"][0][
-        "related_query"
-    ]["queries"][0]["condition"]["value"] = email
 
-    return query_template
+def iter_close_leads(query):
+    """
+    Iterate over the leads matching a Close query, one page at a time.
+
+    Leads are yielded as soon as their page arrives, so callers that only
+    need to stream-process leads never hold the full result set in memory.
+
+    Args:
+        query (dict): The Close query to execute.
+
+    Yields:
+        dict: Each lead matching the query.
+
+    Raises:
+        Exception: If the Close API returns an unexpected response.
+    """
+    cursor = None
+    # Ask for full pages unless the query sets its own page size.
+    if "_limit" not in query:
+        query = {**query, "_limit": CLOSE_SEARCH_PAGE_SIZE}
+
+    # Encode the query once; later pages only splice their cursor in before
+    # the closing brace. The query always has _limit, so it is never empty,
+    # and any cursor of its own is left out so the key is not duplicated.
+    body = orjson.dumps(query)
+    body_without_cursor = orjson.dumps(
+        {key: value for key, value in query.items() if key != "cursor"}
+    )[:-1]
+
+    while True:
+        if cursor:
+            body = body_without_cursor + b',"cursor":' + orjson.dumps(cursor) + b"}"
+
+        response = make_close_request(
+            "post",
+            "https://api.close.com/api/v1/data/search/",
+            data=body,
+            timeout=30,
+        )
+        response_data = orjson.loads(response.content)
+
+        # Log response data for debugging; lazy formatting keeps the page from
+        # being stringified unless DEBUG is enabled.
+        logger.debug("Close API Response: %r", response_data)
+
+        if "data" not in response_data:
+            logger.error(f"Unexpected response format from Close API: {response_data}")
+            raise Exception("Invalid response format from Close API")
+
+        number_of_leads_retrieved = len(response_data["data"])
+        logger.info(
+            f"Number of leads retrieved: {number_of_leads_retrieved}, "
+            f"Current cursor: {cursor}"
+        )
+
+        yield from response_data["data"]
+
+        # Get next cursor
+        cursor = response_data.get("cursor")
+        if not cursor:
+            logger.info("No more pages to fetch from Close API.")
+            break
 
 
 def search_close_leads(query):
@@ -299,43 +514,7 @@ def search_close_leads(query):
         list: A list of leads matching the query, or empty list if none found or error occurs.
     """
     try:
-        data_to_return = []
-        cursor = None
-
-        while True:
-            if cursor:
-                query["cursor"] = cursor
-
-            response = make_close_request(
-                "post",
-                "https://api.close.com/api/v1/data/search/",
-                json=query,
-                timeout=30,
-            )
-            response_data = response.json()
-
-            # Log response data for debugging
-            logger.debug(f"Close API Response: {response_data}")
-
-            if "data" not in response_data:
-                logger.error(
-                    f"Unexpected response format from Close API: {response_data}"
-                )
-                raise Exception("Invalid response format from Close API")
-
-            number_of_leads_retrieved = len(response_data["data"])
-            logger.info(
-                f"Number of leads retrieved: {number_of_leads_retrieved}, "
-                f"Current cursor: {cursor}"
-            )
-
-            data_to_return.extend(response_data["data"])
-
-            # Get next cursor
-            cursor = response_data.get("cursor")
-            if not cursor:
-                logger.info("No more pages to fetch from Close API.")
-                break
+        data_to_return = list(iter_close_leads(query))
 
         if not data_to_return:
             logger.warning("No leads found in Close API search")
@@ -345,7 +524,7 @@ def search_close_leads(query):
 
     except Exception as e:
         logger.error(f"Failed to search Close leads: {e}")
-        logger.error(f"Query used: {query}")
+        logger.error("Query used: %r", query)
         logger.error(f"Traceback: {traceback.format_exc()}")
         return []  # Return empty list instead of None
 
@@ -531,66 +710,15 @@ def pause_sequence_subscription(subscription_id, status_reason="replied"):
         return None
 
 
-def update_delivery_information_for_lead(lead_id, delivery_information) -> None:
+def update_delivery_information_for_lead(
+    lead_id, delivery_information: DeliveryInformation
+) -> None:
     """Update lead with delivery information."""
-
-    def verify_delivery_information_updated(response_data, lead_update_data):
-        for key, value in lead_update_data.items():
-            if key not in response_data or response_data[key] != value:
-                return False
-        return True
-
-    custom_field_ids = {
-        "date_and_location_of_mailer_delivered": {
-            "type": "text",
-            "value": "custom.cf_DTgmXXPozUH3707H1MYu2PhhDznJjWbtmDcb7zme5a9",
-        },
-        "package_delivered": {
-            "type": "dropdown_single",
-            "value": "custom.cf_wkZ5ptOR1Ro3YPxJPYipI35M7ticuYvJHFgp2y4fzdQ",
-        },
-        "state_delivered": {
-            "type": "text",
-            "value": "custom.cf_vxfsYfTrFk6oYrnSx0ViYrUMpE7y5sxi0NnRgTyOf30",
-        },
-        "city_delivered": {
-            "type": "text",
-            "value": "custom.cf_1hWUFxiA6QhUXrYT3lDh96JSWKxVBBAKCB3XO8EXGUW",
-        },
-        "date_delivered": {
-            "type": "date",
-            "value": "custom.cf_jVU4YFLX5bDq2dRjvBapPYAJxGP0iQWid9QC7cQjSCR",
-        },
-        "date_delivered_readable": {
-            "type": "text",
-            "value": "custom.cf_jGC3O9doWfvwFV49NBIRGwA0PFIcKMzE0h8Zf65XLCQ",
-        },
-        "location_delivered": {
-            "type": "text",
-            "value": "custom.cf_hPAtbaFuztYBQcYVqsk4pIFV0hKvnlb696TknlzEERS",
-        },
-    }
     lead_update_data = {
-        custom_field_ids["date_and_location_of_mailer_delivered"][
-            "value"
-        ]: delivery_information["date_and_location_of_mailer_delivered"],
-        custom_field_ids["package_delivered"]["value"]: "Yes",
-        custom_field_ids["state_delivered"]["value"]: delivery_information[
-            "delivery_state"
-        ],
-        custom_field_ids["city_delivered"]["value"]: delivery_information[
-            "delivery_city"
-        ],
-        custom_field_ids["date_delivered"]["value"]: delivery_information[
-            "delivery_date"
-        ].isoformat(),
-        custom_field_ids["date_delivered_readable"]["value"]: delivery_information[
-            "delivery_date_readable"
-        ],
-        custom_field_ids["location_delivered"]["value"]: delivery_information[
-            "location_delivered"
-        ],
+        field_id: transform(getattr(delivery_information, key))
+        for field_id, key, transform in _DELIVERY_FIELDS
     }
+    lead_update_data[_PACKAGE_DELIVERED_FIELD_ID] = "Yes"
 
     response = make_close_request(
         "put",
@@ -600,6 +728,6 @@ def update_delivery_information_for_lead(lead_id, delivery_information) -> None:
     if response.status_code != 200:
         raise Exception("Close did not accept the lead update.")
     response_data = response.json()
-    data_updated = verify_delivery_information_updated(response_data, lead_update_data)
+    data_updated = lead_update_data.items() <= response_data.items()
     if not data_updated:
         raise Exception("Close accepted the lead, but the fields did not update.")
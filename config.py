@@ -1,4 +1,5 @@
 import os
+import sys
 
 from utils.parse_config import parse_error_email_recipients_csv
 
@@ -15,17 +16,20 @@ ERROR_EMAIL_RECIPIENTS = parse_error_email_recipients_csv(ERROR_EMAIL_RECIPIENTS
 # Campaign name used in integration tests that run against prod. No error email will be sent for this campaign.
 TEST_CAMPAIGN_NAME = "Test20250305"
 
-print("=== ENVIRONMENT INFO ===")
-print(f"ENV_TYPE: {env_type}")
-print(f"TEMPORAL_WORKFLOW_UI_BASE_URL: {TEMPORAL_WORKFLOW_UI_BASE_URL}")
-print(f"CLOSE_CRM_UI_LEAD_BASE_URL: {CLOSE_CRM_UI_LEAD_BASE_URL}")
-print(
-    f"MAILER_AUTOMATION_TEMPORAL_PLAYBOOK_URL: {MAILER_AUTOMATION_TEMPORAL_PLAYBOOK_URL}"
-)
-print(
-    f"TEMPORAL_WORKFLOW_ACTIVITY_MAX_ATTEMPTS: {TEMPORAL_WORKFLOW_ACTIVITY_MAX_ATTEMPTS}"
-)
-print(f"ERROR_EMAIL_RECIPIENTS_CSV: {ERROR_EMAIL_RECIPIENTS_CSV}")
-print(f"ERROR_EMAIL_RECIPIENTS: {ERROR_EMAIL_RECIPIENTS}")
-print(f"TEST_CAMPAIGN_NAME: {TEST_CAMPAIGN_NAME}")
-print("=== END ENVIRONMENT INFO ===")
+# Only print the environment banner in development; production workers import
+# this module on every start and the banner is just log noise there.
+if env_type == "development":
+    # Emit the banner as a single write rather than one print per line.
+    banner_lines = [
+        "=== ENVIRONMENT INFO ===",
+        f"ENV_TYPE: {env_type}",
+        f"TEMPORAL_WORKFLOW_UI_BASE_URL: {TEMPORAL_WORKFLOW_UI_BASE_URL}",
+        f"CLOSE_CRM_UI_LEAD_BASE_URL: {CLOSE_CRM_UI_LEAD_BASE_URL}",
+        f"MAILER_AUTOMATION_TEMPORAL_PLAYBOOK_URL: {MAILER_AUTOMATION_TEMPORAL_PLAYBOOK_URL}",
+        f"TEMPORAL_WORKFLOW_ACTIVITY_MAX_ATTEMPTS: {TEMPORAL_WORKFLOW_ACTIVITY_MAX_ATTEMPTS}",
+        f"ERROR_EMAIL_RECIPIENTS_CSV: {ERROR_EMAIL_RECIPIENTS_CSV}",
+        f"ERROR_EMAIL_RECIPIENTS: {ERROR_EMAIL_RECIPIENTS}",
+        f"TEST_CAMPAIGN_NAME: {TEST_CAMPAIGN_NAME}",
+        "=== END ENVIRONMENT INFO ===",
+    ]
+    sys.stdout.write("\n".join(banner_lines) + "\n")
@@ -12,14 +12,23 @@ Usage:
 
 import os
 import sys
-import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
-# Add the parent directory to Python path so we can import from tests/utils
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import orjson
 
-from tests.utils.close_api import CloseAPI
-from scripts.generate_test_leads import load_test_leads
+# When run as a script, add the parent directory to Python path so we can
+# import from tests/utils. Importing this module doesn't need the path hack.
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.generate_test_leads import get_close_api, load_test_leads
+
+# Number of concurrent DELETE requests sent to Close
+DELETE_WORKERS = 10
+# Minimum number of seconds between progress lines
+PROGRESS_INTERVAL_SECONDS = 2.0
 
 
 def cleanup_test_leads(filename="test_leads_3000.json"):
@@ -51,36 +60,49 @@ def cleanup_test_leads(filename="test_leads_3000.json"):
         return 0, 0
 
     # Initialize Close API
-    close_api = CloseAPI()
+    close_api = get_close_api()
 
     successful_deletions = 0
+    already_deleted = 0
     failed_deletions = []
+    last_progress = time.monotonic()
 
     print("Deleting leads...")
 
-    for i, lead in enumerate(leads):
-        lead_id = lead["id"]
-
-        try:
-            result = close_api.delete_lead(lead_id)
-            if result == {} or result is True:  # Successful deletion
-                successful_deletions += 1
-            else:
-                failed_deletions.append(
-                    {"id": lead_id, "error": f"Unexpected result: {result}"}
+    # Deletes are network-bound, so run them concurrently. CloseAPI already
+    # backs off on 429 responses, which keeps us within Close's rate limits.
+    with ThreadPoolExecutor(max_workers=DELETE_WORKERS) as executor:
+        futures = {
+            executor.submit(close_api.delete_lead_if_exists, lead["id"]): lead["id"]
+            for lead in leads
+        }
+
+        for completed, future in enumerate(as_completed(futures), start=1):
+            lead_id = futures[future]
+
+            try:
+                if future.result():
+                    successful_deletions += 1
+                else:
+                    # Lead was already gone, e.g. from an earlier partial cleanup
+                    already_deleted += 1
+
+            except Exception as e:
+                failed_deletions.append({"id": lead_id, "error": str(e)})
+
+            # Progress indicator at most every few seconds, and on the last lead
+            now = time.monotonic()
+            is_last = completed == len(leads)
+            if now - last_progress >= PROGRESS_INTERVAL_SECONDS or is_last:
+                last_progress = now
+                print(
+                    f"  Deleted {completed}/{len(leads)} leads ({len(failed_deletions)} failures)"
                 )
 
-        except Exception as e:
-            failed_deletions.append({"id": lead_id, "error": str(e)})
-
-        # Progress indicator every 100 deletions
-        if (i + 1) % 100 == 0:
-            print(
-                f"  Deleted {i + 1}/{len(leads)} leads ({len(failed_deletions)} failures)"
-            )
-
     print("\n=== CLEANUP COMPLETE ===")
     print(f"Successfully deleted: {successful_deletions} leads")
+    if already_deleted:
+        print(f"Already deleted: {already_deleted} leads")
     print(f"Failed to delete: {len(failed_deletions)} leads")
 
     if failed_deletions:
@@ -91,17 +113,14 @@ def cleanup_test_leads(filename="test_leads_3000.json"):
         failure_file = os.path.join(scripts_dir, "cleanup_failures.json")
 
         try:
-            with open(failure_file, "w") as f:
-                json.dump(
-                    {
-                        "cleanup_date": datetime.now().isoformat(),
-                        "total_attempted": len(leads),
-                        "successful_deletions": successful_deletions,
-                        "failed_deletions": failed_deletions,
-                    },
-                    f,
-                    indent=2,
-                )
+            report = {
+                "cleanup_date": datetime.now().isoformat(),
+                "total_attempted": len(leads),
+                "successful_deletions": successful_deletions,
+                "failed_deletions": failed_deletions,
+            }
+            with open(failure_file, "wb") as f:
+                f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
             print(f"Failure details saved to: {failure_file}")
         except Exception as e:
             print(f"Could not save failure report: {e}")
@@ -1,3 +1,4 @@
+import functools
 import logging
 import os
 import structlog
@@ -11,22 +12,31 @@ class Environment(Enum):
     STAGING = "STAGING"
 
 
+@functools.lru_cache(maxsize=None)
+def _env_config(environment: Environment) -> tuple[str | None, str | None, str | None]:
+    """Read (api_key, address, namespace) for an environment once per process."""
+    suffix = environment.value
+    return (
+        os.getenv(f"TEMPORAL_API_KEY_{suffix}"),
+        os.getenv(f"TEMPORAL_ADDRESS_{suffix}"),
+        os.getenv(f"TEMPORAL_NAMESPACE_{suffix}"),
+    )
+
+
 async def get_temporal_client(environment: Environment) -> Client:
     logging.basicConfig(level=logging.INFO)
     logger = structlog.get_logger(__name__)
 
-    api_key = os.getenv(f"TEMPORAL_API_KEY_{environment.value}")
+    api_key, target_host, namespace = _env_config(environment)
 
     # Check for mTLS authentication
     if api_key:
-        target_host = os.getenv(f"TEMPORAL_ADDRESS_{environment.value}")
-        namespace = os.getenv(f"TEMPORAL_NAMESPACE_{environment.value}")
         if not target_host or not namespace:
             raise ValueError(f"TEMPORAL_ADDRESS_{environment.value} and TEMPORAL_NAMESPACE_{environment.value} must be set when using API key authentication")
         tls = True
     else:
-        target_host = os.getenv(f"TEMPORAL_ADDRESS_{environment.value}", "localhost:7233")
-        namespace = os.getenv(f"TEMPORAL_NAMESPACE_{environment.value}", "default")
+        target_host = target_host or "localhost:7233"
+        namespace = namespace or "default"
         tls = False
     
     logger.info("connecting_to_temporal_server",
@@ -14,17 +14,81 @@ Output:
     - Prints progress and final summary
 """
 
+import functools
+import mmap
 import os
 import sys
-import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-# Add the parent directory to Python path so we can import from tests/utils
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import orjson
+
+# When run as a script, add the parent directory to Python path so we can
+# import from tests/utils. Importing this module doesn't need the path hack.
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from tests.utils.close_api import CloseAPI
 
 
+@functools.lru_cache(maxsize=None)
+def get_close_api():
+    """Return the Close API client shared by the test lead scripts."""
+    return CloseAPI()
+
+
+# Lead custom fields set on every generated test lead
+COMPANY_FIELD_ID = "custom.lcf_tRacWU9nMn0l2i0xhizYpewewmw995aWYaJKgDgDb9o"
+DATE_AND_LOCATION_FIELD_ID = "custom.cf_DTgmXXPozUH3707H1MYu2PhhDznJjWbtmDcb7zme5a9"
+
+# Number of concurrent lead creations sent to Close
+CREATE_WORKERS = 10
+# Minimum number of seconds between progress lines
+PROGRESS_INTERVAL_SECONDS = 2.0
+
+
+def _create_test_lead(close_api, timestamp, location, i):
+    """
+    Create a single numbered test lead in Close.
+
+    Args:
+        close_api (CloseAPI): Close API client
+        timestamp (str): Timestamp shared by this batch of leads
+        location (str): Date & location value shared by this batch of leads
+        i (int): Index of the lead within the batch
+
+    Returns:
+        tuple: (lead_info, None) on success, or (None, failure_info) on failure
+    """
+    # Generate unique email with timestamp and index
+    email = f"lance+timeout+{timestamp}+{i}@whiteboardgeeks.com"
+
+    try:
+        lead_data = close_api.create_test_lead(
+            email=email,
+            first_name="TimeoutTestLead",
+            last_name=str(i),
+            custom_fields={
+                COMPANY_FIELD_ID: f"Timeout Test Company {i}",
+                DATE_AND_LOCATION_FIELD_ID: location,
+            },
+            include_date_location=False,  # We're setting it manually above
+        )
+    except Exception as e:
+        print(f"✗ Failed to create lead {i}: {e}")
+        return None, {"index": i, "email": email, "error": str(e)}
+
+    # Store just the essential data we need for testing
+    lead_info = {
+        "id": lead_data["id"],
+        "email": email,
+        "name": f"TimeoutTestLead {i}",
+        "created_at": lead_data.get("date_created", datetime.now().isoformat()),
+    }
+    return lead_info, None
+
+
 def generate_test_leads(count=2999):
     """
     Generate the specified number of test leads in Close.
@@ -36,53 +100,40 @@ def generate_test_leads(count=2999):
         list: List of created lead data with IDs
     """
     print(f"\n=== GENERATING {count} TEST LEADS FOR TIMEOUT REPRODUCTION ===")
-    print("This will take several minutes. Progress will be shown every 50 leads.")
+    print("This will take several minutes. Progress will be shown every few seconds.")
 
     # Initialize Close API
-    close_api = CloseAPI()
+    close_api = get_close_api()
 
     # Generate timestamp for unique identification
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    location = f"Timeout Test Location {timestamp}"
 
     created_leads = []
     failed_leads = []
-
-    for i in range(count):
-        # Generate unique email with timestamp and index
-        email = f"lance+timeout+{timestamp}+{i}@whiteboardgeeks.com"
-
-        try:
-            lead_data = close_api.create_test_lead(
-                email=email,
-                first_name="TimeoutTestLead",
-                last_name=str(i),
-                custom_fields={
-                    "custom.lcf_tRacWU9nMn0l2i0xhizYpewewmw995aWYaJKgDgDb9o": f"Timeout Test Company {i}",  # Company
-                    "custom.cf_DTgmXXPozUH3707H1MYu2PhhDznJjWbtmDcb7zme5a9": f"Timeout Test Location {timestamp}",  # Date & Location
-                },
-                include_date_location=False,  # We're setting it manually above
-            )
-
-            # Store just the essential data we need for testing
-            lead_info = {
-                "id": lead_data["id"],
-                "email": email,
-                "name": f"TimeoutTestLead {i}",
-                "created_at": lead_data.get("date_created", datetime.now().isoformat()),
-            }
-            created_leads.append(lead_info)
-
-            # Progress indicator every 50 leads
-            if (i + 1) % 50 == 0:
+    last_progress = time.monotonic()
+
+    # Lead creation is network-bound, so run requests concurrently. Results come
+    # back in index order; a failed lead doesn't stop the others.
+    with ThreadPoolExecutor(max_workers=CREATE_WORKERS) as executor:
+        results = executor.map(
+            lambda i: _create_test_lead(close_api, timestamp, location, i),
+            range(count),
+        )
+        for i, (lead_info, failure) in enumerate(results):
+            if failure:
+                failed_leads.append(failure)
+            else:
+                created_leads.append(lead_info)
+
+            # Progress indicator at most every few seconds, and on the last lead
+            now = time.monotonic()
+            if now - last_progress >= PROGRESS_INTERVAL_SECONDS or i + 1 == count:
+                last_progress = now
                 print(
                     f"✓ Created {i + 1}/{count} test leads ({len(failed_leads)} failures)"
                 )
 
-        except Exception as e:
-            print(f"✗ Failed to create lead {i}: {e}")
-            failed_leads.append({"index": i, "email": email, "error": str(e)})
-            # Continue with other leads even if one fails
-
     print("\n=== LEAD GENERATION COMPLETE ===")
     print(f"Successfully created: {len(created_leads)} leads")
     print(f"Failed to create: {len(failed_leads)} leads")
@@ -119,8 +170,8 @@ def save_leads_to_file(leads_data, filename="test_leads_2999.json"):
     }
 
     try:
-        with open(filepath, "w") as f:
-            json.dump(save_data, f, indent=2)
+        with open(filepath, "wb") as f:
+            f.write(orjson.dumps(save_data, option=orjson.OPT_INDENT_2))
         print(f"✓ Lead data saved to: {filepath}")
         print(f"  File size: {os.path.getsize(filepath)} bytes")
         return filepath
@@ -147,8 +198,12 @@ def load_test_leads(filename="test_leads_2999.json"):
         return []
 
     try:
-        with open(filepath, "r") as f:
-            data = json.load(f)
+        # Parse the memory-mapped file in one go, without copying it into an
+        # intermediate buffer first.
+        with open(filepath, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    data = orjson.loads(view)
 
         leads = data.get("leads", [])
         print(f"✓ Loaded {len(leads)} test leads from: {filepath}")
@@ -203,16 +258,13 @@ def main():
             else "test_leads_failures.json"
         )
         try:
-            with open(failed_filepath, "w") as f:
-                json.dump(
-                    {
-                        "failed_at": datetime.now().isoformat(),
-                        "total_failures": len(failed_leads),
-                        "failures": failed_leads,
-                    },
-                    f,
-                    indent=2,
-                )
+            report = {
+                "failed_at": datetime.now().isoformat(),
+                "total_failures": len(failed_leads),
+                "failures": failed_leads,
+            }
+            with open(failed_filepath, "wb") as f:
+                f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
             print(f"✓ Failed lead info saved to: {failed_filepath}")
         except Exception as e:
             print(f"✗ Could not save failure info: {e}")
@@ -19,20 +19,30 @@ https://developer.instantly.ai/api/v2/webhookevent/listwebhookevent
 from __future__ import annotations
 
 import argparse
-import json
 import os
 import sys
 from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, Iterator
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 INSTANTLY_API_ENDPOINT = "https://api.instantly.ai/api/v2/webhook-events"
 OUTPUT_DIR = Path(__file__).resolve().parent.parent / "instantly_weebhook_events"
 REQUEST_TIMEOUT_SECONDS = 30
 DATE_FORMAT = "%Y-%m-%d"
+WRITE_BUFFER_BYTES = 1 << 20
+# Retry transient failures and rate limiting without losing pagination state
+REQUEST_RETRY = Retry(
+    total=5,
+    backoff_factor=0.3,
+    status_forcelist=[429, 502, 503, 504],
+    allowed_methods=["GET"],
+)
 
 
 def fetch_webhook_events(
@@ -40,8 +50,8 @@ def fetch_webhook_events(
     start_date: date,
     end_date: date,
     limit: int = 100,
-) -> List[dict]:
-    """Fetch Instantly webhook events within the given date window."""
+) -> Iterator[dict]:
+    """Yield Instantly webhook events within the given date window, page by page."""
 
     headers = {
         "Authorization": f"Bearer {api_key}",
@@ -54,10 +64,11 @@ def fetch_webhook_events(
         "to": end_date.strftime("%Y-%m-%d"),
     }
 
-    events: List[dict] = []
     starting_after: str | None = None
 
     with requests.Session() as session:
+        session.mount("https://", HTTPAdapter(max_retries=REQUEST_RETRY))
+
         while True:
             if starting_after:
                 params["starting_after"] = starting_after
@@ -82,24 +93,37 @@ def fetch_webhook_events(
                     "Unexpected response structure: 'items' is not a list"
                 )
 
-            events.extend(items)
+            yield from items
             starting_after = payload.get("next_starting_after")
 
             if not starting_after:
                 break
 
-    return events
 
+def write_events_to_jsonl(events: Iterable[dict], destination: Path) -> int:
+    """Stream webhook events to a JSONL file and return how many were written.
 
-def write_events_to_jsonl(events: Iterable[dict], destination: Path) -> None:
-    """Persist webhook events to a JSONL file."""
+    Events go to a temporary file next to the destination, which is renamed
+    into place only once every event has been written. If fetching fails
+    part-way, the temporary file is removed and no partial output is left.
+    """
 
     destination.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = destination.with_name(f"{destination.name}.partial")
+
+    count = 0
+    try:
+        with partial_path.open("wb", buffering=WRITE_BUFFER_BYTES) as handle:
+            for event in events:
+                handle.write(orjson.dumps(event))
+                handle.write(b"\n")
+                count += 1
+        os.replace(partial_path, destination)
+    except BaseException:
+        partial_path.unlink(missing_ok=True)
+        raise
 
-    with destination.open("w", encoding="utf-8") as handle:
-        for event in events:
-            handle.write(json.dumps(event, ensure_ascii=False))
-            handle.write("\n")
+    return count
 
 
 def _parse_date(value: str) -> date:
@@ -154,20 +178,21 @@ def main() -> None:
         print("--from date must be on or before --to date.", file=sys.stderr)
         sys.exit(1)
 
+    timestamp = now.strftime("%Y%m%dT%H%M%SZ")
+    output_path = OUTPUT_DIR / f"{timestamp}.jsonl"
+
+    # Events are written as each page arrives rather than collected in memory.
     try:
-        events = fetch_webhook_events(api_key, start_date, end_date)
+        event_count = write_events_to_jsonl(
+            fetch_webhook_events(api_key, start_date, end_date), output_path
+        )
     except RuntimeError as exc:
         print(str(exc), file=sys.stderr)
         sys.exit(1)
 
-    timestamp = now.strftime("%Y%m%dT%H%M%SZ")
-    output_path = OUTPUT_DIR / f"{timestamp}.jsonl"
-
-    write_events_to_jsonl(events, output_path)
-
     print(
         "Fetched {} events between {} and {}.".format(
-            len(events),
+            event_count,
             start_date.strftime("%Y-%m-%d"),
             end_date.strftime("%Y-%m-%d"),
         )
@@ -13,8 +13,14 @@ Optional flags:
     --filter-exec-status S  Filter workflows by execution status (Running or Completed).
     --take T        Only process the first T workflows.
     --workflow-type T       Filter workflows by workflow type.
+    --format F              Output format: jsonl (default) or sqlite.
+    --environment E         Environment label stored with each row (required for sqlite).
+    --no-payload            Skip the history lookup for the workflow input; "pl" is written as null.
+    --no-result             Skip fetching results of completed workflows; "result" is written as null.
 
 It saves workflow data as JSONL to: <output_dir>/<timestamp>.jsonl
+With --format sqlite the rows are written straight into <output_dir>/<timestamp>.db,
+using the same tables as scripts.temporal_workflow_runs_to_sqlite.
 
 For each workflow, the following information is saved:
     - *Workflow ID
@@ -33,22 +39,42 @@ import os
 
 import argparse
 import asyncio
-import json
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
+from typing import Callable, Iterator
 
-from temporalio.client import Client, WorkflowHandle, WorkflowExecutionStatus
+import orjson
+from temporalio.client import Client, WorkflowExecution, WorkflowHandle, WorkflowExecutionStatus
 
 from temporal.client_provider import get_temporal_client
+from scripts.temporal_workflow_runs_to_sqlite import WorkflowRunsSqliteWriter
 from temporal.shared import WAITING_FOR_RESUME_KEY
 
-# Environment variables
-TEMPORAL_ADDRESS = os.environ["TEMPORAL_ADDRESS"]
-TEMPORAL_NAMESPACE = os.environ["TEMPORAL_NAMESPACE"]
-TEMPORAL_API_KEY = os.environ["TEMPORAL_API_KEY"]
-
-
-async def main(output_dir: str, filter_exec_status: str | None, take: int | None, workflow_type: str | None):
+# Environment variables read by get_temporal_client; only checked when the
+# script is run, so importing this module has no side effects
+REQUIRED_ENV_VARS = ("TEMPORAL_ADDRESS", "TEMPORAL_NAMESPACE", "TEMPORAL_API_KEY")
+
+WRITE_BUFFER_BYTES = 1 << 20
+# History lookups run concurrently, with a bounded number of workflows
+# waiting to be written at any time
+HISTORY_FETCH_CONCURRENCY = 32
+MAX_PENDING_WORKFLOWS = 128
+# Workflow inputs and results may carry non-string keys
+JSONL_OPTIONS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+
+
+async def main(
+    output_dir: str,
+    filter_exec_status: str | None,
+    take: int | None,
+    workflow_type: str | None,
+    output_format: str = "jsonl",
+    environment: str | None = None,
+    include_payload: bool = True,
+    include_result: bool = True,
+):
     client = await get_temporal_client()
 
     # Create output directory structure
@@ -56,8 +82,6 @@ async def main(output_dir: str, filter_exec_status: str | None, take: int | None
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
 
-    output_file = output_path / f"{timestamp}.jsonl"
-
     query_parts = []
     if filter_exec_status:
         query_parts.append(f'ExecutionStatus = "{filter_exec_status}"')
@@ -70,35 +94,83 @@ async def main(output_dir: str, filter_exec_status: str | None, take: int | None
     else:
         workflow_iterator = client.list_workflows()
 
-    with open(output_file, 'w') as f:
+    semaphore = asyncio.Semaphore(HISTORY_FETCH_CONCURRENCY)
+
+    with open_output(output_path / timestamp, output_format, environment) as write_rows:
         count = 0
+        # Tasks in list order; lookups overlap while the output keeps that order
+        pending: deque[asyncio.Task[dict]] = deque()
         async for wf in workflow_iterator:
             if take is not None and count >= take:
                 break
-            workflow_id = wf.id
-            workflow_type = wf.workflow_type
-            workflow_handle = client.get_workflow_handle(workflow_id, run_id=wf.run_id)
-            start_time = str(wf.start_time)
-            status = str(wf.status)
-            waiting_for_resume = wf.typed_search_attributes.get(WAITING_FOR_RESUME_KEY)
-
-            json_payload = await fetch_json_payload_from_history(client, workflow_handle)
-            workflow_result = await get_workflow_result(workflow_handle, wf.status)
-
-            # Create JSON object for this workflow
-            workflow_data = {
-                "workflow_id": workflow_id,
-                "workflow_type": workflow_type,
-                "start_time": start_time,
-                "status": status,
-                "waiting_for_resume": waiting_for_resume,
-                "pl": json_payload,
-                "result": workflow_result
-            }
-
-            # Write as JSONL (one JSON object per line)
-            f.write(json.dumps(workflow_data) + '\n')
+            pending.append(asyncio.create_task(build_workflow_data(client, semaphore, wf, include_payload, include_result)))
             count += 1
+            if len(pending) >= MAX_PENDING_WORKFLOWS:
+                await pending[0]
+                write_rows(drain_completed(pending))
+        await asyncio.gather(*pending)
+        write_rows(drain_completed(pending))
+
+
+@contextmanager
+def open_output(
+    output_stem: Path, output_format: str, environment: str | None
+) -> Iterator[Callable[[list[dict]], None]]:
+    # Yield a function that writes a list of workflow rows to the chosen sink
+    if output_format == "sqlite":
+        with WorkflowRunsSqliteWriter(str(output_stem.with_suffix(".db")), environment or "unknown") as writer:
+            def write_sqlite(rows: list[dict]) -> None:
+                for row in rows:
+                    writer.add(row)
+            yield write_sqlite
+        return
+
+    with open(output_stem.with_suffix(".jsonl"), 'wb', buffering=WRITE_BUFFER_BYTES) as f:
+        def write_jsonl(rows: list[dict]) -> None:
+            f.writelines(orjson.dumps(row, option=JSONL_OPTIONS) for row in rows)
+        yield write_jsonl
+
+
+def drain_completed(pending: deque[asyncio.Task[dict]]) -> list[dict]:
+    # Pop the finished tasks at the head of the queue
+    rows = []
+    while pending and pending[0].done():
+        rows.append(pending.popleft().result())
+    return rows
+
+
+async def build_workflow_data(
+    client: Client,
+    semaphore: asyncio.Semaphore,
+    wf: WorkflowExecution,
+    include_payload: bool = True,
+    include_result: bool = True,
+) -> dict:
+    workflow_handle = client.get_workflow_handle(wf.id, run_id=wf.run_id)
+    json_payload = None
+    workflow_result = None
+    if include_payload or include_result:
+        async with semaphore:
+            # The input and result lookups are independent RPCs, so overlap them
+            json_payload, workflow_result = await asyncio.gather(
+                fetch_json_payload_from_history(client, workflow_handle) if include_payload else skip(),
+                get_workflow_result(workflow_handle, wf.status) if include_result else skip(),
+            )
+
+    # Create JSON object for this workflow
+    return {
+        "workflow_id": wf.id,
+        "workflow_type": wf.workflow_type,
+        "start_time": str(wf.start_time),
+        "status": str(wf.status),
+        "waiting_for_resume": wf.typed_search_attributes.get(WAITING_FOR_RESUME_KEY),
+        "pl": json_payload,
+        "result": workflow_result
+    }
+
+
+async def skip() -> None:
+    return None
 
 
 async def fetch_json_payload_from_history(client: Client, handle: WorkflowHandle) -> dict:
@@ -154,9 +226,36 @@ def parse_args():
         "--workflow-type",
         help="Filter workflows by workflow type.",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--format",
+        choices=["jsonl", "sqlite"],
+        default="jsonl",
+        help="Write JSONL, or write rows straight into a SQLite database.",
+    )
+    parser.add_argument(
+        "--environment",
+        choices=["prod", "staging"],
+        help="Environment label stored with each row in the SQLite output.",
+    )
+    parser.add_argument(
+        "--no-payload",
+        action="store_true",
+        help="Don't fetch workflow inputs from history; write null for them.",
+    )
+    parser.add_argument(
+        "--no-result",
+        action="store_true",
+        help="Don't fetch results of completed workflows; write null for them.",
+    )
+    args = parser.parse_args()
+    if args.format == "sqlite" and not args.environment:
+        parser.error("--environment is required with --format sqlite")
+    return args
 
 
 if __name__ == "__main__":
     args = parse_args()
-    asyncio.run(main(output_dir=args.output_dir, filter_exec_status=args.filter_exec_status, take=args.take, workflow_type=args.workflow_type))
+    missing_env_vars = [name for name in REQUIRED_ENV_VARS if name not in os.environ]
+    if missing_env_vars:
+        raise SystemExit(f"Missing environment variables: {', '.join(missing_env_vars)}")
+    asyncio.run(main(output_dir=args.output_dir, filter_exec_status=args.filter_exec_status, take=args.take, workflow_type=args.workflow_type, output_format=args.format, environment=args.environment, include_payload=not args.no_payload, include_result=not args.no_result))
@@ -25,9 +25,26 @@ import sys
 import asyncio
 import argparse
 import csv
-from pathlib import Path
+import uuid
+from temporalio.api.batch.v1 import BatchOperationTermination
+from temporalio.api.common.v1 import WorkflowExecution
+from temporalio.api.enums.v1 import BatchOperationState
+from temporalio.api.workflowservice.v1 import DescribeBatchOperationRequest, StartBatchOperationRequest, StopBatchOperationRequest
+from temporalio.client import WorkflowExecutionStatus
 from scripts.client_provider import get_temporal_client, Environment
 
+# Maximum number of terminate RPCs in flight at once
+TERMINATE_CONCURRENCY = 50
+
+# Workflows per server-side batch terminate job, and how often to poll it
+BATCH_SIZE = 1000
+BATCH_POLL_INTERVAL_SECONDS = 1.0
+# A batch still running after this long is stopped and its chunk falls back to
+# per-workflow termination
+BATCH_MAX_WAIT_SECONDS = 300.0
+
+CSV_BUFFER_BYTES = 1 << 20
+
 
 async def terminate_workflow(client, workflow_id: str, environment: str, dry_run: bool = False):
     """Terminate a single workflow"""
@@ -43,21 +60,100 @@ async def terminate_workflow(client, workflow_id: str, environment: str, dry_run
         print(f"Error terminating workflow {workflow_id} in {environment}: {e}")
 
 
+async def terminate_with_sem(sem: asyncio.Semaphore, client, workflow_id: str, environment: str, dry_run: bool = False):
+    """Terminate a single workflow once a concurrency slot is free"""
+    async with sem:
+        await terminate_workflow(client, workflow_id, environment, dry_run)
+
+
+async def terminate_batch(client, workflow_ids: list[str], environment: str) -> bool:
+    """Terminate workflows with one server-side batch operation.
+
+    Returns True if every workflow in the batch was terminated.
+    """
+    job_id = str(uuid.uuid4())
+    try:
+        await client.workflow_service.start_batch_operation(StartBatchOperationRequest(
+            namespace=client.namespace,
+            job_id=job_id,
+            reason="fixed manually",
+            executions=[WorkflowExecution(workflow_id=workflow_id) for workflow_id in workflow_ids],
+            termination_operation=BatchOperationTermination(identity=client.identity),
+        ))
+
+        deadline = asyncio.get_running_loop().time() + BATCH_MAX_WAIT_SECONDS
+        while True:
+            batch = await client.workflow_service.describe_batch_operation(DescribeBatchOperationRequest(
+                namespace=client.namespace,
+                job_id=job_id,
+            ))
+            if batch.state != BatchOperationState.BATCH_OPERATION_STATE_RUNNING:
+                break
+            if asyncio.get_running_loop().time() >= deadline:
+                print(f"Batch terminate {job_id} in {environment} still running after {BATCH_MAX_WAIT_SECONDS:g}s, stopping it")
+                await stop_batch(client, job_id, environment)
+                return False
+            await asyncio.sleep(BATCH_POLL_INTERVAL_SECONDS)
+    except Exception as e:
+        print(f"Error running batch terminate {job_id} in {environment}: {e}")
+        return False
+
+    print(
+        f"Batch terminate {job_id} in {environment}: "
+        f"{batch.complete_operation_count} terminated, {batch.failure_operation_count} failed"
+    )
+    return (
+        batch.state == BatchOperationState.BATCH_OPERATION_STATE_COMPLETED
+        and batch.failure_operation_count == 0
+    )
+
+
+async def stop_batch(client, job_id: str, environment: str):
+    """Stop a batch operation, best effort"""
+    try:
+        await client.workflow_service.stop_batch_operation(StopBatchOperationRequest(
+            namespace=client.namespace,
+            job_id=job_id,
+            reason="timed out waiting for batch terminate",
+            identity=client.identity,
+        ))
+    except Exception as e:
+        print(f"Error stopping batch terminate {job_id} in {environment}: {e}")
+
+
+async def is_terminated(sem: asyncio.Semaphore, client, workflow_id: str) -> bool:
+    """Check whether a workflow is already terminated; unknown counts as not"""
+    async with sem:
+        try:
+            description = await client.get_workflow_handle(workflow_id).describe()
+        except Exception:
+            return False
+    return description.status == WorkflowExecutionStatus.TERMINATED
+
+
+async def not_yet_terminated(client, workflow_ids: list[str]) -> list[str]:
+    """Drop the workflows a partially successful batch already terminated"""
+    sem = asyncio.Semaphore(TERMINATE_CONCURRENCY)
+    terminated = await asyncio.gather(*[
+        is_terminated(sem, client, workflow_id) for workflow_id in workflow_ids
+    ])
+    return [workflow_id for workflow_id, done in zip(workflow_ids, terminated) if not done]
+
+
 async def process_csv_file(csv_file: str, dry_run: bool = False):
     """Process the CSV file and terminate workflows as specified"""
     
-    # Validate CSV file exists
-    csv_path = Path(csv_file)
-    if not csv_path.exists():
+    try:
+        file = open(csv_file, 'r', newline='', encoding='utf-8', buffering=CSV_BUFFER_BYTES)
+    except FileNotFoundError:
         print(f"Error: CSV file '{csv_file}' not found")
         sys.exit(1)
     
-    # Initialize clients
-    client_prod = None
-    client_staging = None
+    # Workflows to terminate as (workflow_id, environment) pairs
+    to_terminate = []
     
     # Read and process CSV
-    with open(csv_path, 'r', newline='', encoding='utf-8') as file:
+    with file:
         reader = csv.DictReader(file)
         
         # Validate required columns
@@ -82,15 +178,11 @@ async def process_csv_file(csv_file: str, dry_run: bool = False):
                 continue
             
             if todo == 'terminate_prod':
-                if not dry_run and client_prod is None:
-                    client_prod = await get_temporal_client(Environment.PROD)
-                await terminate_workflow(client_prod, workflow_id, "PROD", dry_run)
+                to_terminate.append((workflow_id, "PROD"))
                 rows_terminated += 1
                 
             elif todo == 'terminate_stg':
-                if not dry_run and client_staging is None:
-                    client_staging = await get_temporal_client(Environment.STAGING)
-                await terminate_workflow(client_staging, workflow_id, "STAGING", dry_run)
+                to_terminate.append((workflow_id, "STAGING"))
                 rows_terminated += 1
                 
             elif todo == 'noop':
@@ -102,6 +194,33 @@ async def process_csv_file(csv_file: str, dry_run: bool = False):
             else:
                 print(f"Row {row_num}: Unknown todo value '{todo}' for workflow {workflow_id} - skipping")
     
+    # Connect each needed client once up front
+    clients = {"PROD": None, "STAGING": None}
+    if not dry_run:
+        environments = {environment for _, environment in to_terminate}
+        if "PROD" in environments:
+            clients["PROD"] = await get_temporal_client(Environment.PROD)
+        if "STAGING" in environments:
+            clients["STAGING"] = await get_temporal_client(Environment.STAGING)
+    
+    # Terminate in server-side batches per environment; a batch that does not
+    # fully succeed is retried one workflow at a time
+    to_terminate_individually = to_terminate if dry_run else []
+    if not dry_run:
+        for environment in ("PROD", "STAGING"):
+            workflow_ids = [workflow_id for workflow_id, env in to_terminate if env == environment]
+            for start in range(0, len(workflow_ids), BATCH_SIZE):
+                chunk = workflow_ids[start:start + BATCH_SIZE]
+                if not await terminate_batch(clients[environment], chunk, environment):
+                    remaining = await not_yet_terminated(clients[environment], chunk)
+                    to_terminate_individually.extend((workflow_id, environment) for workflow_id in remaining)
+    
+    sem = asyncio.Semaphore(TERMINATE_CONCURRENCY)
+    await asyncio.gather(*[
+        terminate_with_sem(sem, clients[environment], workflow_id, environment, dry_run)
+        for workflow_id, environment in to_terminate_individually
+    ])
+    
     print(f"\nSummary:")
     print(f"Total rows processed: {rows_processed}")
     print(f"Workflows terminated: {rows_terminated}")
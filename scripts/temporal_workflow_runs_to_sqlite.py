@@ -14,9 +14,28 @@ import os
 import re
 import sqlite3
 import sys
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Deque, Dict, Iterator, List, Tuple, TypeVar
+
+import orjson
+
+# Number of rows passed to each executemany call
+INSERT_BATCH_SIZE = 1000
+
+# Number of JSONL lines handed to each parse worker at a time
+PARSE_CHUNK_LINES = 1000
+
+# Line chunks submitted to the process pool ahead of the one being consumed,
+# per CPU; bounds how much of a file is held in memory at once
+PARSE_CHUNKS_IN_FLIGHT_PER_CPU = 2
+
+_T = TypeVar('_T')
+
+_NON_WORD_RE = re.compile(r'\W+')
 
 
 def flatten_json(obj: Dict[str, Any], parent_key: str = '', sep: str = '_') -> Dict[str, Any]:
@@ -31,60 +50,161 @@ def flatten_json(obj: Dict[str, Any], parent_key: str = '', sep: str = '_') -> D
     Returns:
         Flattened dictionary
     """
-    items = []
-    
-    for key, value in obj.items():
-        new_key = f"{parent_key}{sep}{key}" if parent_key else key
-        
-        if isinstance(value, dict):
-            # Recursively flatten nested dictionaries
-            items.extend(flatten_json(value, new_key, sep=sep).items())
-        elif isinstance(value, list):
-            # Convert lists to JSON strings for storage
-            items.append((new_key, json.dumps(value)))
+    flattened: Dict[str, Any] = {}
+    _dict, _list, _dumps = dict, list, json.dumps
+
+    # Walk nested dictionaries with an explicit stack of (prefix, items) pairs,
+    # descending depth first so keys come out in the same order as before
+    stack = [(parent_key, iter(obj.items()))]
+    while stack:
+        prefix, items = stack[-1]
+        for key, value in items:
+            new_key = prefix + sep + key if prefix else key
+
+            if isinstance(value, _dict):
+                stack.append((new_key, iter(value.items())))
+                break
+            elif isinstance(value, _list):
+                # Convert lists to JSON strings for storage
+                flattened[new_key] = _dumps(value)
+            else:
+                flattened[new_key] = value
         else:
-            items.append((new_key, value))
-    
-    return dict(items)
+            stack.pop()
+
+    return flattened
 
 
-def get_columns_by_workflow_type(jsonl_files: List[Tuple[str, str]]) -> Dict[str, set]:
+def parse_and_flatten(
+    chunk: Tuple[str, str, int, List[bytes]]
+) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[str]]:
     """
-    Scan JSONL files and collect column names per workflow type.
+    Parse and flatten a chunk of raw JSONL lines.
+
+    Runs in a worker process, so invalid lines are reported back as warning
+    messages for the parent to print instead of being printed here.
 
     Args:
-        jsonl_files: List of tuples (file_path, environment)
+        chunk: Tuple of (file_path, environment, first line number, raw lines)
 
     Returns:
-        Mapping of workflow_type to discovered column names
+        Tuple of (workflow_type, flattened record) pairs and warning messages
     """
+    jsonl_file, environment, first_line_num, lines = chunk
+    records = []
+    warnings = []
+
+    for line_num, line in enumerate(lines, first_line_num):
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            json_obj = orjson.loads(line)
+        except json.JSONDecodeError as e:
+            warnings.append(f"Warning: Skipping invalid JSON in {jsonl_file} on line {line_num}: {e}")
+            continue
+
+        flattened = flatten_json(json_obj)
+        workflow_type = flattened.get('workflow_type') or 'unknown'
+        flattened['workflow_type'] = workflow_type
+        flattened['environment'] = environment
+        records.append((workflow_type, flattened))
+
+    return records, warnings
+
+
+def _iter_line_chunks(
+    jsonl_file: str, environment: str
+) -> Iterator[Tuple[str, str, int, List[bytes]]]:
+    """Yield the lines of a JSONL file in chunks of PARSE_CHUNK_LINES."""
+    with open(jsonl_file, 'rb') as f:
+        first_line_num = 1
+        while True:
+            lines = list(islice(f, PARSE_CHUNK_LINES))
+            if not lines:
+                return
+            yield jsonl_file, environment, first_line_num, lines
+            first_line_num += len(lines)
+
+
+def _map_line_chunks(
+    executor: ProcessPoolExecutor,
+    fn: Callable[[Tuple[str, str, int, List[bytes]]], _T],
+    jsonl_file: str,
+    environment: str
+) -> Iterator[_T]:
+    """
+    Apply fn to the line chunks of a file in the pool, yielding in file order.
+
+    Unlike executor.map, which submits every chunk up front, only a bounded
+    number of chunks are read and submitted ahead of the consumer.
+    """
+    max_in_flight = PARSE_CHUNKS_IN_FLIGHT_PER_CPU * (os.cpu_count() or 1)
+    in_flight: Deque[Future] = deque()
+
+    for chunk in _iter_line_chunks(jsonl_file, environment):
+        in_flight.append(executor.submit(fn, chunk))
+        if len(in_flight) >= max_in_flight:
+            yield in_flight.popleft().result()
+
+    while in_flight:
+        yield in_flight.popleft().result()
+
+
+def collect_columns(
+    chunk: Tuple[str, str, int, List[bytes]]
+) -> Tuple[Dict[str, set], List[str]]:
+    """
+    Collect the flattened column names per workflow type in a chunk of lines.
+
+    Runs in a worker process, so only the column names travel back to the
+    parent rather than the flattened records.
+
+    Args:
+        chunk: Tuple of (file_path, environment, first line number, raw lines)
+
+    Returns:
+        Tuple of column names per workflow type and warning messages
+    """
+    records, warnings = parse_and_flatten(chunk)
     columns_by_workflow_type: Dict[str, set] = defaultdict(set)
+    for workflow_type, flattened in records:
+        columns_by_workflow_type[workflow_type].update(flattened.keys())
+    return columns_by_workflow_type, warnings
 
-    for jsonl_file, environment in jsonl_files:
-        with open(jsonl_file, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if not line:
-                    continue
 
-                try:
-                    json_obj = json.loads(line)
-                    flattened = flatten_json(json_obj)
-                    workflow_type = flattened.get('workflow_type') or 'unknown'
-                    columns_by_workflow_type[workflow_type].update(flattened.keys())
-                except json.JSONDecodeError as e:
-                    print(f"Warning: Skipping invalid JSON in {jsonl_file} on line {line_num}: {e}")
-                    continue
+def determine_schema(jsonl_files: List[Tuple[str, str]]) -> Dict[str, set]:
+    """
+    Determine the column names for each workflow type across all files.
 
-    for columns in columns_by_workflow_type.values():
-        columns.add('workflow_type')
-        columns.add('environment')
+    Only the column names are kept; the records themselves are parsed again
+    by insert_records, so memory use does not grow with the file size.
 
-    return columns_by_workflow_type
+    Args:
+        jsonl_files: List of tuples (file_path, environment)
+
+    Returns:
+        Dictionary mapping workflow types to their column names
+    """
+    columns_by_workflow_type: Dict[str, set] = defaultdict(set)
+
+    with ProcessPoolExecutor() as executor:
+        for jsonl_file, environment in jsonl_files:
+            for chunk_columns, warnings in _map_line_chunks(
+                executor, collect_columns, jsonl_file, environment
+            ):
+                for warning in warnings:
+                    print(warning)
+
+                for workflow_type, columns in chunk_columns.items():
+                    columns_by_workflow_type[workflow_type].update(columns)
+
+    return dict(columns_by_workflow_type)
 
 
 def _sanitize_workflow_type(workflow_type: str) -> str:
-    sanitized = re.sub(r'\W+', '_', workflow_type.strip().lower())
+    sanitized = _NON_WORD_RE.sub('_', workflow_type.strip().lower())
     sanitized = sanitized.strip('_') or 'unknown'
     if sanitized[0].isdigit():
         sanitized = f'_{sanitized}'
@@ -131,89 +251,207 @@ def create_table_schema(table_name: str, columns: set) -> str:
     )
 
 
+def connect_for_bulk_load(db_path: str) -> sqlite3.Connection:
+    """
+    Open a connection tuned for loading a freshly built database.
+
+    The output database is rebuilt from scratch on every run, so durability
+    is traded for speed: no fsyncs and an exclusive lock. The rollback journal
+    is kept in memory rather than switched off so that savepoint rollbacks in
+    _insert_batch still work. Transactions are managed explicitly.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    cursor = conn.cursor()
+    cursor.execute('PRAGMA page_size=65536')
+    cursor.execute('PRAGMA journal_mode=MEMORY')
+    cursor.execute('PRAGMA synchronous=OFF')
+    cursor.execute('PRAGMA locking_mode=EXCLUSIVE')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA cache_size=-524288')
+    return conn
+
+
+@dataclass
+class TableSpec:
+    """Table name, column order and prepared INSERT for one workflow type."""
+
+    table_name: str
+    columns: List[str]
+    insert_sql: str = field(init=False)
+    # Every record key is one of the columns, so filling a copy of this
+    # template keeps the values in column order with None for gaps
+    template: Dict[str, None] = field(init=False)
+
+    def __post_init__(self) -> None:
+        placeholders = ', '.join(['?'] * len(self.columns))
+        column_names = ', '.join([f'"{col}"' for col in self.columns])
+        self.insert_sql = (
+            f'INSERT INTO "{self.table_name}" ({column_names}) '
+            f'VALUES ({placeholders})'
+        )
+        self.template = dict.fromkeys(self.columns)
+
+
 def insert_records(
     db_path: str,
     jsonl_files: List[Tuple[str, str]],
-    columns_by_workflow_type: Dict[str, List[str]],
-    table_name_by_workflow_type: Dict[str, str]
+    table_spec_by_workflow_type: Dict[str, TableSpec]
 ) -> Dict[str, int]:
     """
     Insert all records from JSONL files into the SQLite database.
 
+    Each chunk of lines is inserted as soon as it has been parsed, so only the
+    chunks in flight are held in memory.
+
     Args:
         db_path: Path to the SQLite database
         jsonl_files: List of tuples (file_path, environment)
-        columns_by_workflow_type: Ordered column names per workflow type
-        table_name_by_workflow_type: Mapping from workflow type to table name
+        table_spec_by_workflow_type: Table spec per workflow type
 
     Returns:
         Number of records inserted per workflow type
     """
-    conn = sqlite3.connect(db_path)
+    conn = connect_for_bulk_load(db_path)
     cursor = conn.cursor()
 
-    prepared_statements: Dict[str, Tuple[str, List[str]]] = {}
     records_inserted: Dict[str, int] = defaultdict(int)
     total_inserted = 0
 
-    for jsonl_file, environment in jsonl_files:
-        print(f"Processing {environment} environment file: {jsonl_file}")
-
-        with open(jsonl_file, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if not line:
-                    continue
-
-                try:
-                    json_obj = json.loads(line)
-                    flattened = flatten_json(json_obj)
-                    workflow_type = flattened.get('workflow_type') or 'unknown'
-                    
-                    if workflow_type not in columns_by_workflow_type:
-                        print(
-                            f"Warning: Skipping record with unknown workflow_type '{workflow_type}' "
-                            f"in {jsonl_file} on line {line_num}"
-                        )
-                        continue
-
-                    flattened['workflow_type'] = workflow_type
-                    flattened['environment'] = environment
-
-                    if workflow_type not in prepared_statements:
-                        columns = columns_by_workflow_type[workflow_type]
-                        placeholders = ', '.join(['?' for _ in columns])
-                        column_names = ', '.join([f'"{col}"' for col in columns])
-                        table_name = table_name_by_workflow_type[workflow_type]
-                        insert_sql = (
-                            f'INSERT INTO "{table_name}" ({column_names}) '
-                            f'VALUES ({placeholders})'
-                        )
-                        prepared_statements[workflow_type] = (insert_sql, columns)
-
-                    insert_sql, ordered_columns = prepared_statements[workflow_type]
-                    values = [flattened.get(col) for col in ordered_columns]
-
-                    cursor.execute(insert_sql, values)
-                    records_inserted[workflow_type] += 1
-                    total_inserted += 1
-
-                    if total_inserted % 100 == 0:
-                        print(f"Processed {total_inserted} records...")
-
-                except json.JSONDecodeError as e:
-                    print(f"Warning: Skipping invalid JSON in {jsonl_file} on line {line_num}: {e}")
-                    continue
-                except sqlite3.Error as e:
-                    print(f"Database error in {jsonl_file} on line {line_num}: {e}")
-                    continue
+    cursor.execute('BEGIN IMMEDIATE')
+    with ProcessPoolExecutor() as executor:
+        for jsonl_file, environment in jsonl_files:
+            print(f"Processing {environment} environment file: {jsonl_file}")
+
+            for records, _warnings in _map_line_chunks(
+                executor, parse_and_flatten, jsonl_file, environment
+            ):
+                rows_by_workflow_type: Dict[str, List[tuple]] = defaultdict(list)
+                for workflow_type, flattened in records:
+                    template = table_spec_by_workflow_type[workflow_type].template
+                    rows_by_workflow_type[workflow_type].append(_row_values(template, flattened))
+
+                for workflow_type, rows in rows_by_workflow_type.items():
+                    insert_sql = table_spec_by_workflow_type[workflow_type].insert_sql
+                    inserted = _insert_batch(cursor, insert_sql, rows, workflow_type)
+                    records_inserted[workflow_type] += inserted
+                    total_inserted += inserted
+                print(f"Processed {total_inserted} records...")
+    cursor.execute('COMMIT')
 
-    conn.commit()
     conn.close()
 
     return dict(records_inserted)
 
 
+def _row_values(template: Dict[str, None], flattened: Dict[str, Any]) -> tuple:
+    row: Dict[str, Any] = template.copy()
+    row.update(flattened)
+    return tuple(row.values())
+
+
+def _insert_batch(cursor: sqlite3.Cursor, insert_sql: str, rows: List[tuple], workflow_type: str) -> int:
+    """Insert rows with executemany, falling back to row by row on errors."""
+    cursor.execute('SAVEPOINT insert_batch')
+    try:
+        cursor.executemany(insert_sql, rows)
+        inserted = len(rows)
+    except sqlite3.Error:
+        # Redo the batch one row at a time so only the failing rows are skipped
+        cursor.execute('ROLLBACK TO insert_batch')
+        inserted = 0
+        for row in rows:
+            try:
+                cursor.execute(insert_sql, row)
+                inserted += 1
+            except sqlite3.Error as e:
+                print(f"Database error inserting {workflow_type} record: {e}")
+    cursor.execute('RELEASE insert_batch')
+    return inserted
+
+
+class WorkflowRunsSqliteWriter:
+    """
+    Write workflow runs straight into a SQLite database as they arrive.
+
+    Used by temporal_list_workflows to skip the intermediate JSONL file.
+    Records are buffered and inserted INSERT_BATCH_SIZE at a time; tables are
+    created the first time a workflow type is seen and widened with
+    ALTER TABLE ADD COLUMN whenever a batch brings new fields.
+    """
+
+    def __init__(self, db_path: str, environment: str):
+        self.db_path = db_path
+        self.environment = environment
+        self.table_spec_by_workflow_type: Dict[str, TableSpec] = {}
+        self.records_inserted: Dict[str, int] = defaultdict(int)
+        self._used_table_names: set = set()
+        self._pending: List[Dict[str, Any]] = []
+
+        self.conn = connect_for_bulk_load(db_path)
+        self.cursor = self.conn.cursor()
+
+    def __enter__(self) -> 'WorkflowRunsSqliteWriter':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def add(self, workflow_data: Dict[str, Any]) -> None:
+        flattened = flatten_json(workflow_data)
+        flattened['workflow_type'] = flattened.get('workflow_type') or 'unknown'
+        flattened['environment'] = self.environment
+        self._pending.append(flattened)
+
+        if len(self._pending) >= INSERT_BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+
+        records_by_workflow_type: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for flattened in self._pending:
+            records_by_workflow_type[flattened['workflow_type']].append(flattened)
+        self._pending = []
+
+        self.cursor.execute('BEGIN IMMEDIATE')
+        for workflow_type, records in records_by_workflow_type.items():
+            table_spec = self._ensure_table(workflow_type, records)
+            rows = [_row_values(table_spec.template, flattened) for flattened in records]
+            self.records_inserted[workflow_type] += _insert_batch(
+                self.cursor, table_spec.insert_sql, rows, workflow_type
+            )
+        self.cursor.execute('COMMIT')
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
+
+    def _ensure_table(self, workflow_type: str, records: List[Dict[str, Any]]) -> TableSpec:
+        """Create or widen the table for a workflow type and return its spec."""
+        batch_columns: set = set()
+        for flattened in records:
+            batch_columns.update(flattened.keys())
+
+        table_spec = self.table_spec_by_workflow_type.get(workflow_type)
+        if table_spec is None:
+            table_name = make_table_name(workflow_type, self._used_table_names)
+            self.cursor.execute(create_table_schema(table_name, batch_columns))
+            table_spec = TableSpec(table_name, sorted(batch_columns))
+            self.table_spec_by_workflow_type[workflow_type] = table_spec
+            return table_spec
+
+        new_columns = sorted(batch_columns.difference(table_spec.columns))
+        if not new_columns:
+            return table_spec
+
+        for col in new_columns:
+            self.cursor.execute(f'ALTER TABLE "{table_spec.table_name}" ADD COLUMN "{col}" TEXT')
+        table_spec = TableSpec(table_spec.table_name, table_spec.columns + new_columns)
+        self.table_spec_by_workflow_type[workflow_type] = table_spec
+        return table_spec
+
+
 def convert_jsonl_to_sqlite(
     jsonl_files: List[Tuple[str, str]],
     output_db_path: str
@@ -239,26 +477,26 @@ def convert_jsonl_to_sqlite(
         print(f"Removing existing database: {db_path}")
         db_path.unlink()
     
-    # Step 1: Scan all files to get columns per workflow type
-    print("Scanning files to determine schema...")
-    columns_by_workflow_type = get_columns_by_workflow_type(jsonl_files)
+    # Step 1: Determine schema for each workflow type
+    print("Reading files and determining schema...")
+    columns_by_workflow_type = determine_schema(jsonl_files)
     if not columns_by_workflow_type:
         raise ValueError("No workflow runs found in provided files")
 
     print(f"Found {len(columns_by_workflow_type)} workflow types")
 
     table_name_by_workflow_type: Dict[str, str] = {}
-    ordered_columns_by_workflow_type: Dict[str, List[str]] = {}
+    table_spec_by_workflow_type: Dict[str, TableSpec] = {}
     used_table_names: set = set()
 
     for workflow_type, columns in columns_by_workflow_type.items():
         table_name = make_table_name(workflow_type, used_table_names)
         table_name_by_workflow_type[workflow_type] = table_name
-        ordered_columns_by_workflow_type[workflow_type] = sorted(columns)
+        table_spec_by_workflow_type[workflow_type] = TableSpec(table_name, sorted(columns))
 
     # Step 2: Create database and tables
     print("Creating database and tables...")
-    conn = sqlite3.connect(str(db_path))
+    conn = connect_for_bulk_load(str(db_path))
     cursor = conn.cursor()
 
     for workflow_type, table_name in table_name_by_workflow_type.items():
@@ -270,14 +508,13 @@ def convert_jsonl_to_sqlite(
 
     # Step 3: Insert all records
     print("Inserting records...")
-    records_by_workflow_type = insert_records(
+    records_inserted_by_workflow_type = insert_records(
         str(db_path),
         jsonl_files,
-        ordered_columns_by_workflow_type,
-        table_name_by_workflow_type
+        table_spec_by_workflow_type
     )
 
-    total_records = sum(records_by_workflow_type.values())
+    total_records = sum(records_inserted_by_workflow_type.values())
     print(f"Successfully converted {total_records} records to {db_path}")
 
     # Print some statistics
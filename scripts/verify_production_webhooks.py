@@ -5,12 +5,16 @@ This script checks if necessary webhooks exist and creates any missing ones.
 """
 
 import os
-import json
 import base64
 import requests
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any
 
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -30,6 +34,43 @@ if PRODUCTION_URL and PRODUCTION_URL.endswith("/"):
 # Verification status
 webhooks_verified = True
 
+WEBHOOK_PAGE_SIZE = 100
+
+
+class WebhookRetry(Retry):
+    """Retry list calls on transient errors, and creates only when rate limited.
+
+    A 429 means the request was rejected before anything was created, so
+    resending a create cannot produce a duplicate webhook. Any other failed
+    create is left to the caller.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method == "POST" and status_code == 429:
+            return bool(self.total)
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+REQUEST_RETRY = WebhookRetry(
+    total=5,
+    backoff_factor=0.5,
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods=["GET"],
+    respect_retry_after_header=True,
+    # Hand the final response back so failures are logged like any other
+    raise_on_status=False,
+)
+
+
+def create_session() -> requests.Session:
+    """Create a session that keeps connections alive between API calls."""
+    session = requests.Session()
+    session.mount(
+        "https://",
+        HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=REQUEST_RETRY),
+    )
+    return session
+
 
 class CloseAPI:
     def __init__(self, api_key):
@@ -41,16 +82,40 @@ class CloseAPI:
             "Authorization": f"Basic {self.encoded_key}",
         }
         self.base_url = "https://api.close.com/api/v1"
+        self.session = create_session()
+        self.session.headers.update(self.headers)
 
-    def list_webhooks(self) -> List[Dict[str, Any]]:
-        """List all webhooks in Close."""
-        response = requests.get(f"{self.base_url}/webhook/", headers=self.headers)
+    def __enter__(self):
+        return self
 
-        if response.status_code != 200:
-            logger.error(f"Failed to list Close webhooks: {response.text}")
-            return []
+    def __exit__(self, *exc_info):
+        self.close()
 
-        return response.json().get("data", [])
+    def close(self):
+        self.session.close()
+
+    def list_webhooks(self) -> Optional[List[Dict[str, Any]]]:
+        """List all webhooks in Close, paging with _skip until has_more is false.
+
+        Returns None if the webhooks could not be listed.
+        """
+        webhooks: List[Dict[str, Any]] = []
+        params: Dict[str, Any] = {"_limit": WEBHOOK_PAGE_SIZE, "_skip": 0}
+
+        while True:
+            response = self.session.get(f"{self.base_url}/webhook/", params=params)
+
+            if response.status_code != 200:
+                logger.error(f"Failed to list Close webhooks: {response.text}")
+                return None
+
+            response_data = orjson.loads(response.content)
+            page = response_data.get("data", [])
+            webhooks.extend(page)
+
+            if not response_data.get("has_more") or not page:
+                return webhooks
+            params["_skip"] += len(page)
 
     def create_webhook_for_task_created(self) -> Optional[str]:
         """Create a webhook to catch task created events with "Instantly" prefix."""
@@ -75,12 +140,10 @@ class CloseAPI:
             ],
         }
 
-        response = requests.post(
-            f"{self.base_url}/webhook/", json=payload, headers=self.headers
-        )
+        response = self.session.post(f"{self.base_url}/webhook/", data=orjson.dumps(payload))
 
         if response.status_code == 201:
-            webhook_id = response.json()["id"]
+            webhook_id = orjson.loads(response.content)["id"]
             return webhook_id
         else:
             logger.error(
@@ -94,16 +157,16 @@ class CloseAPI:
 
         # Load webhook configuration with complex filters for tracking info
         try:
-            with open("tests/utils/close_webhook_delivery_info_filters.json", "r") as f:
-                webhook_data = json.load(f)
+            with open("tests/utils/close_webhook_delivery_info_filters.json", "rb") as f:
+                webhook_data = orjson.loads(f.read())
             webhook_data["url"] = webhook_url
 
-            response = requests.post(
-                f"{self.base_url}/webhook/", json=webhook_data, headers=self.headers
+            response = self.session.post(
+                f"{self.base_url}/webhook/", data=orjson.dumps(webhook_data)
             )
 
             if response.status_code == 201:
-                webhook_id = response.json()["id"]
+                webhook_id = orjson.loads(response.content)["id"]
                 return webhook_id
             else:
                 logger.error(
@@ -120,16 +183,31 @@ class EasyPostAPI:
         """Initialize EasyPost API client with the API key."""
         self.api_key = api_key
         self.base_url = "https://api.easypost.com/v2"
+        self.session = create_session()
+        self.session.auth = (api_key, "")
+        self.session.headers.update({"Content-Type": "application/json"})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
-    def list_webhooks(self) -> List[Dict[str, Any]]:
-        """List all webhooks in EasyPost."""
-        response = requests.get(f"{self.base_url}/webhooks", auth=(self.api_key, ""))
+    def close(self):
+        self.session.close()
+
+    def list_webhooks(self) -> Optional[List[Dict[str, Any]]]:
+        """List all webhooks in EasyPost.
+
+        Returns None if the webhooks could not be listed.
+        """
+        response = self.session.get(f"{self.base_url}/webhooks")
 
         if response.status_code != 200:
             logger.error(f"Failed to list EasyPost webhooks: {response.text}")
-            return []
+            return None
 
-        return response.json().get("webhooks", [])
+        return orjson.loads(response.content).get("webhooks", [])
 
     def create_webhook(self) -> Optional[str]:
         """Create a webhook for delivery status updates."""
@@ -137,12 +215,12 @@ class EasyPostAPI:
 
         create_data = {"webhook": {"url": webhook_url, "mode": "production"}}
 
-        response = requests.post(
-            f"{self.base_url}/webhooks", auth=(self.api_key, ""), json=create_data
+        response = self.session.post(
+            f"{self.base_url}/webhooks", data=orjson.dumps(create_data)
         )
 
         if response.status_code in [200, 201]:
-            return response.json()["id"]
+            return orjson.loads(response.content)["id"]
         else:
             logger.error(f"Failed to create EasyPost webhook: {response.text}")
             return None
@@ -150,98 +228,98 @@ class EasyPostAPI:
 
 def verify_close_webhooks() -> bool:
     """Verify and create Close webhooks."""
-    global webhooks_verified
-
     if not CLOSE_API_KEY:
         logger.error("CLOSE_API_KEY not provided")
-        webhooks_verified = False
         return False
 
-    close_api = CloseAPI(CLOSE_API_KEY)
-    success = True
+    with CloseAPI(CLOSE_API_KEY) as close_api:
+        success = True
 
-    # Get existing webhooks
-    logger.info("Listing existing Close webhooks...")
-    existing_webhooks = close_api.list_webhooks()
+        # Get existing webhooks
+        logger.info("Listing existing Close webhooks...")
+        existing_webhooks = close_api.list_webhooks()
+        if existing_webhooks is None:
+            # Without the current list, creating could duplicate webhooks
+            logger.error("✗ Could not list Close webhooks; not creating any")
+            return False
+        existing_urls = {webhook.get("url") for webhook in existing_webhooks}
 
-    # Check for Instantly task created webhook
-    instantly_webhook_url = f"{PRODUCTION_URL}/instantly/add_lead"
-    instantly_webhook_exists = any(
-        webhook["url"] == instantly_webhook_url for webhook in existing_webhooks
-    )
+        # Check for Instantly task created webhook
+        instantly_webhook_url = f"{PRODUCTION_URL}/instantly/add_lead"
+        instantly_webhook_exists = instantly_webhook_url in existing_urls
 
-    if instantly_webhook_exists:
-        logger.info("✓ Close webhook for Instantly task creation already exists")
-    else:
-        logger.info("! Creating Close webhook for Instantly task creation...")
-        webhook_id = close_api.create_webhook_for_task_created()
-        if webhook_id:
-            logger.info(
-                f"✓ Created Close webhook for Instantly task creation with ID: {webhook_id}"
-            )
+        if instantly_webhook_exists:
+            logger.info("✓ Close webhook for Instantly task creation already exists")
         else:
-            logger.error("✗ Failed to create Close webhook for Instantly task creation")
-            success = False
+            logger.info("! Creating Close webhook for Instantly task creation...")
+            webhook_id = close_api.create_webhook_for_task_created()
+            if webhook_id:
+                logger.info(
+                    f"✓ Created Close webhook for Instantly task creation with ID: {webhook_id}"
+                )
+            else:
+                logger.error(
+                    "✗ Failed to create Close webhook for Instantly task creation"
+                )
+                success = False
 
-    # Check for EasyPost tracking info webhook
-    easypost_webhook_url = f"{PRODUCTION_URL}/easypost/create_tracker"
-    easypost_webhook_exists = any(
-        webhook["url"] == easypost_webhook_url for webhook in existing_webhooks
-    )
+        # Check for EasyPost tracking info webhook
+        easypost_webhook_url = f"{PRODUCTION_URL}/easypost/create_tracker"
+        easypost_webhook_exists = easypost_webhook_url in existing_urls
 
-    if easypost_webhook_exists:
-        logger.info("✓ Close webhook for EasyPost tracking info already exists")
-    else:
-        logger.info("! Creating Close webhook for EasyPost tracking info...")
-        webhook_id = close_api.create_webhook_for_tracking_info()
-        if webhook_id:
-            logger.info(
-                f"✓ Created Close webhook for EasyPost tracking info with ID: {webhook_id}"
-            )
+        if easypost_webhook_exists:
+            logger.info("✓ Close webhook for EasyPost tracking info already exists")
         else:
-            logger.error("✗ Failed to create Close webhook for EasyPost tracking info")
-            success = False
+            logger.info("! Creating Close webhook for EasyPost tracking info...")
+            webhook_id = close_api.create_webhook_for_tracking_info()
+            if webhook_id:
+                logger.info(
+                    f"✓ Created Close webhook for EasyPost tracking info with ID: {webhook_id}"
+                )
+            else:
+                logger.error(
+                    "✗ Failed to create Close webhook for EasyPost tracking info"
+                )
+                success = False
 
-    webhooks_verified = webhooks_verified and success
     return success
 
 
 def verify_easypost_webhooks() -> bool:
     """Verify and create EasyPost webhooks."""
-    global webhooks_verified
-
     if not EASYPOST_PROD_API_KEY:
         logger.error("EASYPOST_PROD_API_KEY not provided")
-        webhooks_verified = False
         return False
 
-    easypost_api = EasyPostAPI(EASYPOST_PROD_API_KEY)
-    success = True
+    with EasyPostAPI(EASYPOST_PROD_API_KEY) as easypost_api:
+        success = True
 
-    # Get existing webhooks
-    logger.info("Listing existing EasyPost webhooks...")
-    existing_webhooks = easypost_api.list_webhooks()
+        # Get existing webhooks
+        logger.info("Listing existing EasyPost webhooks...")
+        existing_webhooks = easypost_api.list_webhooks()
+        if existing_webhooks is None:
+            # Without the current list, creating could duplicate webhooks
+            logger.error("✗ Could not list EasyPost webhooks; not creating any")
+            return False
+        existing_urls = {webhook.get("url") for webhook in existing_webhooks}
 
-    # Check for delivery status webhook
-    delivery_webhook_url = f"{PRODUCTION_URL}/easypost/delivery_status"
-    delivery_webhook_exists = any(
-        webhook["url"] == delivery_webhook_url for webhook in existing_webhooks
-    )
+        # Check for delivery status webhook
+        delivery_webhook_url = f"{PRODUCTION_URL}/easypost/delivery_status"
+        delivery_webhook_exists = delivery_webhook_url in existing_urls
 
-    if delivery_webhook_exists:
-        logger.info("✓ EasyPost webhook for delivery status already exists")
-    else:
-        logger.info("! Creating EasyPost webhook for delivery status...")
-        webhook_id = easypost_api.create_webhook()
-        if webhook_id:
-            logger.info(
-                f"✓ Created EasyPost webhook for delivery status with ID: {webhook_id}"
-            )
+        if delivery_webhook_exists:
+            logger.info("✓ EasyPost webhook for delivery status already exists")
         else:
-            logger.error("✗ Failed to create EasyPost webhook for delivery status")
-            success = False
+            logger.info("! Creating EasyPost webhook for delivery status...")
+            webhook_id = easypost_api.create_webhook()
+            if webhook_id:
+                logger.info(
+                    f"✓ Created EasyPost webhook for delivery status with ID: {webhook_id}"
+                )
+            else:
+                logger.error("✗ Failed to create EasyPost webhook for delivery status")
+                success = False
 
-    webhooks_verified = webhooks_verified and success
     return success
 
 
@@ -258,6 +336,8 @@ def remind_about_manually_configured_webhooks():
 
 def main():
     """Main function to verify and create all necessary webhooks."""
+    global webhooks_verified
+
     logger.info(f"Starting webhook verification for {PRODUCTION_URL}")
 
     # Verify we have a production URL
@@ -265,11 +345,11 @@ def main():
         logger.error("PRODUCTION_URL environment variable not set")
         exit(1)
 
-    # Verify Close webhooks
-    verify_close_webhooks()
-
-    # Verify EasyPost webhooks
-    verify_easypost_webhooks()
+    # Close and EasyPost are separate hosts, so verify both at the same time
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        close_verified = executor.submit(verify_close_webhooks)
+        easypost_verified = executor.submit(verify_easypost_webhooks)
+        webhooks_verified = close_verified.result() and easypost_verified.result()
 
     # Remind about manually configured webhooks
     remind_about_manually_configured_webhooks()
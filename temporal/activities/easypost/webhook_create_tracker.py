@@ -1,7 +1,7 @@
-import json
 from datetime import datetime
 from typing import Any
 
+import orjson
 import structlog
 from pydantic import BaseModel, Field
 from temporalio import activity
@@ -13,11 +13,23 @@ from config import (
 )
 from close_utils import make_close_request
 from temporal.shared import is_last_attempt
-from utils.email import send_email
-from utils.easypost import get_easypost_client
+from utils.email import send_email_in_background
+from utils.redis import get_from_cache, set_to_cache
+from utils.easypost import (
+    CLOSE_TRACKING_NUMBER_FIELD_ID,
+    get_easypost_client,
+    remember_lead_for_tracking_number,
+    search_leads_by_tracking_number,
+)
 
 logger = structlog.get_logger(__name__)
 
+_CARRIER_FIELD_ID = "custom.cf_2QQR5e6vJUyGzlYBtHddFpdqNp5393nEnUiZk1Ukl9l"
+# Only the fields the tracker activity and its error emails use
+_LEAD_FIELDS = f"id,display_name,{CLOSE_TRACKING_NUMBER_FIELD_ID},{_CARRIER_FIELD_ID}"
+# How long a created tracker ID is reused for retries of the same lead
+_TRACKER_CACHE_SECONDS = 60 * 60
+
 
 class CreateTrackerActivityInput(BaseModel):
     lead_id: str = Field(..., description="Close lead identifier.")
@@ -40,6 +52,7 @@ def create_tracker_activity(
     response = make_close_request(
         "get",
         f"https://api.close.com/api/v1/lead/{input.lead_id}",
+        params={"_fields": _LEAD_FIELDS},
     )
 
     if response.status_code != 200:
@@ -53,12 +66,8 @@ def create_tracker_activity(
 
     lead_data = response.json()
 
-    tracking_number = lead_data.get(
-        "custom.cf_iSOPYKzS9IPK20gJ8eH9Q74NT7grCQW9psqo4lZR3Ii"
-    )
-    carrier_field = lead_data.get(
-        "custom.cf_2QQR5e6vJUyGzlYBtHddFpdqNp5393nEnUiZk1Ukl9l"
-    )
+    tracking_number = lead_data.get(CLOSE_TRACKING_NUMBER_FIELD_ID)
+    carrier_field = lead_data.get(_CARRIER_FIELD_ID)
 
     if not tracking_number or not carrier_field:
         if is_last_attempt(activity.info()):
@@ -72,8 +81,7 @@ def create_tracker_activity(
     carrier = carrier_field[0] if isinstance(carrier_field, list) else carrier_field
 
     try:
-        client = get_easypost_client(tracking_number)
-        tracker = client.tracker.create(tracking_code=tracking_number, carrier=carrier)
+        tracker_id = _create_tracker(lead_data["id"], tracking_number, carrier)
     except Exception as exc:  # pragma: no cover - defensive
         if is_last_attempt(activity.info()):
             _send_error_email_create_tracker_failed(
@@ -87,7 +95,68 @@ def create_tracker_activity(
             f"Failed to create tracker for lead {lead_data['id']} with tracking number {tracking_number} and carrier {carrier} : {exc}"
         )
 
-    return CreateTrackerActivityResult(tracker_id=tracker.id)
+    # Lets the delivery-status webhook find the lead without a Close search
+    _remember_lead_if_unique(tracking_number, lead_data["id"])
+
+    return CreateTrackerActivityResult.model_construct(tracker_id=tracker_id)
+
+
+def _create_tracker(lead_id: str, tracking_number: str, carrier: str) -> str:
+    """
+    Create an EasyPost tracker for a lead and return its ID.
+
+    The ID is kept in Redis for an hour under the lead, tracking number and
+    carrier, so activity retries for the same lead don't post the tracker to
+    EasyPost again. Failures raise and are not cached.
+    """
+    cache_key = f"easypost:tracker:{lead_id}:{carrier}:{tracking_number}"
+    tracker_id = get_from_cache(cache_key)
+    if tracker_id:
+        return tracker_id
+
+    client = get_easypost_client(tracking_number)
+    tracker = client.tracker.create(tracking_code=tracking_number, carrier=carrier)
+    set_to_cache(cache_key, tracker.id, _TRACKER_CACHE_SECONDS)
+    return tracker.id
+
+
+def _remember_lead_if_unique(tracking_number: str, lead_id: str) -> None:
+    """
+    Record the lead for a tracking number unless another lead also has it.
+
+    Shared tracking numbers stay unrecorded, so the delivery-status webhook
+    searches for them and reports the duplicate leads. Best effort: the
+    tracker already exists, and a failed search only costs the webhook its
+    shortcut.
+    """
+    try:
+        close_leads = search_leads_by_tracking_number(tracking_number)
+    except Exception as e:
+        logger.warning(
+            "tracking_number_lead_search_failed",
+            tracking_number=tracking_number,
+            error=str(e),
+        )
+        return
+
+    if any(lead["id"] != lead_id for lead in close_leads):
+        logger.warning(
+            "tracking_number_shared_by_leads",
+            tracking_number=tracking_number,
+            lead_ids=[lead["id"] for lead in close_leads],
+        )
+        return
+
+    remember_lead_for_tracking_number(tracking_number, lead_id)
+
+
+def _format_lead_data(lead_data: dict[str, Any]) -> str:
+    """Pretty-print lead data for an error email."""
+    return orjson.dumps(
+        lead_data,
+        option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+        default=str,
+    ).decode()
 
 
 def _send_error_email_lead_data_fetch_failed(
@@ -105,7 +174,7 @@ def _send_error_email_lead_data_fetch_failed(
         <h3>Response from Close:</h3>
         <pre>{response_text}</pre>
         """
-    send_email(
+    send_email_in_background(
         subject="EasyPost Tracker Creation: MailerAutomation failed to fetch lead data from Close",
         body=detailed_error_message,
     )
@@ -124,9 +193,11 @@ def _send_error_email_missing_data(
         <p><strong>Time:</strong> {datetime.now().isoformat()}</p>
         
         <h3>Lead Data:</h3>
-        <pre>{json.dumps(lead_data, indent=2, default=str)}</pre>
+        <pre>{_format_lead_data(lead_data)}</pre>
         """
-    send_email(subject="EasyPost Tracker Missing Data", body=detailed_error_message)
+    send_email_in_background(
+        subject="EasyPost Tracker Missing Data", body=detailed_error_message
+    )
 
 
 def _send_error_email_create_tracker_failed(
@@ -147,25 +218,18 @@ def _send_error_email_create_tracker_failed(
         <p><strong>Time:</strong> {datetime.now().isoformat()}</p>
         
         <h3>Lead Data:</h3>
-        <pre>{json.dumps(lead_data, indent=2, default=str)}</pre>
+        <pre>{_format_lead_data(lead_data)}</pre>
 
         <h3>Error:</h3>
         <pre>{str(error)}</pre>
         """
-    send_email(subject="EasyPost Tracker Creation Failed", body=detailed_error_message)
+    send_email_in_background(
+        subject="EasyPost Tracker Creation Failed", body=detailed_error_message
+    )
 
 
 @activity.defn
 def update_close_lead_activity(input: UpdateCloseLeadActivityInput) -> None:
-
-    def verify_delivery_information_updated(
-        response_data: dict[str, Any], lead_update_data: dict[str, Any]
-    ) -> bool:
-        for key, value in lead_update_data.items():
-            if key not in response_data or response_data[key] != value:
-                return False
-        return True
-
     custom_field_ids = {
         "easypost_tracker_id": {
             "type": "text",
@@ -184,7 +248,9 @@ def update_close_lead_activity(input: UpdateCloseLeadActivityInput) -> None:
     )
 
     response_data = response.json()
-    data_updated = verify_delivery_information_updated(response_data, lead_update_data)
+    # Every updated field must come back with the value we sent; dict items
+    # views compare by key lookup, so unhashable values are fine here
+    data_updated = lead_update_data.items() <= response_data.items()
 
     if not data_updated:
         if is_last_attempt(activity.info()):
@@ -210,4 +276,6 @@ def _send_error_email_update_close_lead_failed(
         <p><strong>Temporal Playbook:</strong> <a href="{MAILER_AUTOMATION_TEMPORAL_PLAYBOOK_URL}">Mailer Automation Temporal Playbook</a></p>
         <p><strong>Time:</strong> {datetime.now().isoformat()}</p>
         """
-    send_email(subject="EasyPost Tracker ID Update Failed", body=detailed_error_message)
+    send_email_in_background(
+        subject="EasyPost Tracker ID Update Failed", body=detailed_error_message
+    )
@@ -1,17 +1,16 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
 from datetime import datetime
 from enum import Enum
 import json
-from typing import Any
-
 from pydantic import BaseModel, Field
 from temporalio import activity
 
 from close_utils import (
+    DeliveryInformation,
     get_lead_by_id,
-    load_query,
-    search_close_leads,
     update_delivery_information_for_lead,
 )
 from config import (
@@ -20,8 +19,22 @@ from config import (
     TEMPORAL_WORKFLOW_UI_BASE_URL,
 )
 from temporal.shared import is_last_attempt
-from utils.easypost import create_package_delivered_custom_activity_in_close
-from utils.email import send_email
+from utils.easypost import (
+    CLOSE_TRACKING_NUMBER_FIELD_ID,
+    create_package_delivered_custom_activity_in_close,
+    format_delivery_date_readable,
+    get_lead_id_for_tracking_number,
+    parse_tracking_datetime,
+    search_leads_by_tracking_number,
+)
+from utils.email import send_email_coalesced, send_email_in_background
+from utils.redis import get_from_cache, set_to_cache
+
+# How long lead search results for a tracking code are reused from Redis
+_TRACKING_SEARCH_CACHE_SECONDS = 30
+
+# Most lead lookups run at once when a tracking number matches several leads
+_LEAD_VALIDATION_CONCURRENCY = 8
 
 
 class UpdateDeliveryInfoInput(BaseModel):
@@ -43,8 +56,9 @@ class TrackingDetail(BaseModel):
 
     @classmethod
     def new(cls, city: str | None, state: str | None, datetime: str) -> TrackingDetail:
-        return cls(
-            tracking_location=TrackingLocation(city=city, state=state),
+        # Built from the already validated workflow payload, so skip validation
+        return cls.model_construct(
+            tracking_location=TrackingLocation.model_construct(city=city, state=state),
             datetime=datetime,
         )
 
@@ -54,6 +68,12 @@ class TrackingLocation(BaseModel):
     state: str | None = Field(..., description="State of the tracking location.")
 
 
+# Resolve the forward references up front: instances made with model_construct
+# never trigger pydantic's lazy rebuild and could not be serialized otherwise
+TrackingDetail.model_rebuild()
+UpdateDeliveryInfoInput.model_rebuild()
+
+
 class CreatePackageDeliveredCustomInput(BaseModel):
     lead_id: str = Field(..., description="Close lead identifier.")
     last_tracking_detail: TrackingDetail = Field(
@@ -73,17 +93,52 @@ class CreatePackageDeliveredCustomResult(BaseModel):
 def update_delivery_info_for_lead_activity(
     input: UpdateDeliveryInfoInput,
 ) -> UpdateDeliveryInfoResult:
-    close_query_to_find_leads_with_tracking_number = load_query(
-        "lead_by_tracking_number.json"
-    )
-    close_query_to_find_leads_with_tracking_number["query"]["queries"][1]["queries"][0][
-        "queries"
-    ][0]["condition"]["value"] = input.tracking_code
+    lead_id = _lead_id_from_tracking_number_map(input.tracking_code)
+    if lead_id is None:
+        lead_id = _find_lead_id_by_search(input)
+
+    delivery_information = _parse_delivery_information(input.last_tracking_detail)
 
     try:
-        close_leads: list[dict] = search_close_leads(
-            close_query_to_find_leads_with_tracking_number
-        )
+        update_delivery_information_for_lead(lead_id, delivery_information)
+    except Exception as e:
+        if is_last_attempt(activity.info()):
+            _send_error_email_lead_update_failed(
+                workflow_id=activity.info().workflow_id,
+                lead_id=lead_id,
+                tracking_code=input.tracking_code,
+                delivery_information=delivery_information,
+                error=e,
+            )
+        raise ValueError(f"Failed to update lead {lead_id}: {e}") from e
+
+    return UpdateDeliveryInfoResult.model_construct(lead_id=lead_id)
+
+
+def _lead_id_from_tracking_number_map(tracking_code: str) -> str | None:
+    """
+    Look up the lead recorded for a tracking number when its tracker was created.
+
+    A hit skips the Close search: the lead is only fetched to confirm it still
+    exists and still carries the tracking number, otherwise None is returned
+    and the caller falls back to the search. Tracking numbers shared by
+    several leads are never recorded (see create_tracker_activity), so those
+    always take the search path and its multiple-leads alert.
+    """
+    lead_id = get_lead_id_for_tracking_number(tracking_code)
+    if not lead_id:
+        return None
+
+    lead = get_lead_by_id(lead_id)
+    if not lead or lead.get(CLOSE_TRACKING_NUMBER_FIELD_ID) != tracking_code:
+        return None
+    return lead_id
+
+
+def _find_lead_id_by_search(input: UpdateDeliveryInfoInput) -> str:
+    """Find the single valid lead with the tracking number via a Close search."""
+    try:
+        close_leads: list[dict] = _search_leads_by_tracking_code(input.tracking_code)
     except Exception as e:
         if is_last_attempt(activity.info()):
             _send_error_email_search_close_leads_failed(
@@ -103,11 +158,17 @@ def update_delivery_info_for_lead_activity(
 
     valid_leads: list[dict] = []
     if len(close_leads) > 1:
-        for lead in close_leads:
-            lead_id_ = lead["id"]
-            valid_lead = get_lead_by_id(lead_id_)
-            if valid_lead:
-                valid_leads.append(lead)
+        # Check the candidates concurrently; the Close rate limiter still
+        # paces the individual requests
+        with ThreadPoolExecutor(
+            max_workers=min(_LEAD_VALIDATION_CONCURRENCY, len(close_leads))
+        ) as executor:
+            fetched_leads = list(
+                executor.map(get_lead_by_id, [lead["id"] for lead in close_leads])
+            )
+        valid_leads = [
+            lead for lead, fetched in zip(close_leads, fetched_leads) if fetched
+        ]
 
         if len(valid_leads) == 1:
             close_leads = valid_leads
@@ -154,24 +215,25 @@ def update_delivery_info_for_lead_activity(
             f"No valid leads found with tracking number {input.tracking_code}"
         )
 
-    lead_id: str = valid_leads[0]["id"]
+    return valid_leads[0]["id"]
 
-    delivery_information = _parse_delivery_information(input.last_tracking_detail)
 
-    try:
-        update_delivery_information_for_lead(lead_id, delivery_information)
-    except Exception as e:
-        if is_last_attempt(activity.info()):
-            _send_error_email_lead_update_failed(
-                workflow_id=activity.info().workflow_id,
-                lead_id=lead_id,
-                tracking_code=input.tracking_code,
-                delivery_information=delivery_information,
-                error=e,
-            )
-        raise ValueError(f"Failed to update lead {lead_id}: {e}") from e
+def _search_leads_by_tracking_code(tracking_code: str) -> list[dict]:
+    """
+    Search Close for leads with a tracking number.
+
+    Non-empty results are cached in Redis for a short while, so repeated or
+    retried webhooks for the same package skip the search.
+    """
+    cache_key = f"close:lead_search:{tracking_code}"
+    cached = get_from_cache(cache_key)
+    if cached:
+        return cached
 
-    return UpdateDeliveryInfoResult(lead_id=lead_id)
+    close_leads = search_leads_by_tracking_number(tracking_code)
+    if close_leads:
+        set_to_cache(cache_key, close_leads, _TRACKING_SEARCH_CACHE_SECONDS)
+    return close_leads
 
 
 def _send_error_email_search_close_leads_failed(
@@ -188,7 +250,7 @@ def _send_error_email_search_close_leads_failed(
         <h3>Error:</h3>
         <pre>{str(error)}</pre>
         """
-    send_email(
+    send_email_coalesced(
         subject="Update Delivery Status: Search for Close Leads Failed",
         body=detailed_error_message,
     )
@@ -203,7 +265,7 @@ def _send_error_email_no_leads_found(workflow_id: str, tracking_code: str) -> No
         <p><strong>Temporal Playbook:</strong> <a href="{MAILER_AUTOMATION_TEMPORAL_PLAYBOOK_URL}">Mailer Automation Temporal Playbook</a></p>
         <p><strong>Time:</strong> {datetime.now().isoformat()}</p>
         """
-    send_email(
+    send_email_coalesced(
         subject="Update Delivery Status: No Leads Found", body=detailed_error_message
     )
 
@@ -222,7 +284,7 @@ def _send_error_email_multiple_leads_found(
         <h3>Leads:</h3>
         <pre>{json.dumps(leads, indent=2, default=str)}</pre>
         """
-    send_email(
+    send_email_in_background(
         subject="Update Delivery Status: Multiple Leads Found",
         body=detailed_error_message,
     )
@@ -239,7 +301,7 @@ def _send_error_email_no_valid_leads_found(
         <p><strong>Temporal Playbook:</strong> <a href="{MAILER_AUTOMATION_TEMPORAL_PLAYBOOK_URL}">Mailer Automation Temporal Playbook</a></p>
         <p><strong>Time:</strong> {datetime.now().isoformat()}</p>
         """
-    send_email(
+    send_email_coalesced(
         subject="Update Delivery Status: No Valid Leads Found",
         body=detailed_error_message,
     )
@@ -257,7 +319,7 @@ def _send_error_email_lead_not_found(
         <p><strong>Temporal Playbook:</strong> <a href="{MAILER_AUTOMATION_TEMPORAL_PLAYBOOK_URL}">Mailer Automation Temporal Playbook</a></p>
         <p><strong>Time:</strong> {datetime.now().isoformat()}</p>
         """
-    send_email(
+    send_email_coalesced(
         subject="Update Delivery Status: Lead Not Found", body=detailed_error_message
     )
 
@@ -266,7 +328,7 @@ def _send_error_email_lead_update_failed(
     workflow_id: str,
     lead_id: str,
     tracking_code: str,
-    delivery_information: dict[str, Any],
+    delivery_information: DeliveryInformation,
     error: Exception,
 ) -> None:
     detailed_error_message = f"""
@@ -279,12 +341,12 @@ def _send_error_email_lead_update_failed(
         <p><strong>Time:</strong> {datetime.now().isoformat()}</p>
         
         <h3>Delivery Information that Failed to Update on Close:</h3>
-        <pre>{json.dumps(delivery_information, indent=2, default=str)}</pre>
+        <pre>{json.dumps(asdict(delivery_information), indent=2, default=str)}</pre>
 
         <h3>Error:</h3>
         <pre>{str(error)}</pre>
         """
-    send_email(
+    send_email_in_background(
         subject="Update Delivery Status: Lead Update Failed",
         body=detailed_error_message,
     )
@@ -316,51 +378,45 @@ def create_package_delivered_custom_activity_in_close_activity(
         resp.get("status") == "skipped"
         and resp.get("reason") == "duplicate_activity_exists"
     ):
-        return CreatePackageDeliveredCustomResult(
+        return CreatePackageDeliveredCustomResult.model_construct(
             status=CreatePackageDeliveredCustomResult.Status.SKIPPED
         )
     else:
-        return CreatePackageDeliveredCustomResult(
+        return CreatePackageDeliveredCustomResult.model_construct(
             status=CreatePackageDeliveredCustomResult.Status.SUCCESS
         )
 
 
-def _parse_delivery_information(tracking_detail: TrackingDetail) -> dict[str, Any]:
+def _parse_delivery_information(tracking_detail: TrackingDetail) -> DeliveryInformation:
     """Parse delivery information from tracking data."""
-    delivery_information: dict[str, Any] = {}
-    delivery_information["delivery_city"] = (
+    delivery_city = (
         tracking_detail.tracking_location.city.title()
         if tracking_detail.tracking_location.city
         else "N/A"
     )
-    delivery_information["delivery_state"] = (
+    delivery_state = (
         tracking_detail.tracking_location.state.upper()
         if tracking_detail.tracking_location.state
         else "N/A"
     )
 
-    delivery_datetime = datetime.strptime(
-        tracking_detail.datetime, "%Y-%m-%dT%H:%M:%SZ"
-    )
+    delivery_datetime = parse_tracking_datetime(tracking_detail.datetime)
+    delivery_date_readable = format_delivery_date_readable(delivery_datetime)
 
-    delivery_information["delivery_date"] = delivery_datetime.date()
-    delivery_information["delivery_date_readable"] = delivery_datetime.strftime(
-        "%a %-m/%-d"
+    return DeliveryInformation(
+        delivery_date=delivery_datetime.date(),
+        delivery_city=delivery_city,
+        delivery_state=delivery_state,
+        location_delivered=f"{delivery_city}, {delivery_state}",
+        date_and_location_of_mailer_delivered=f"{delivery_date_readable} to {delivery_city}, {delivery_state}",
+        delivery_date_readable=delivery_date_readable,
     )
-    delivery_information["date_and_location_of_mailer_delivered"] = (
-        f"{delivery_information['delivery_date_readable']} to {delivery_information['delivery_city']}, {delivery_information['delivery_state']}"
-    )
-    delivery_information["location_delivered"] = (
-        f"{delivery_information['delivery_city']}, {delivery_information['delivery_state']}"
-    )
-
-    return delivery_information
 
 
 def _send_error_email_creation_of_custom_activity_failed(
     workflow_id: str,
     lead_id: str,
-    delivery_information: dict[str, Any],
+    delivery_information: DeliveryInformation,
     error: Exception,
 ) -> None:
     detailed_error_message = f"""
@@ -372,12 +428,12 @@ def _send_error_email_creation_of_custom_activity_failed(
         <p><strong>Time:</strong> {datetime.now().isoformat()}</p>
         
         <h3>Delivery Information that Failed to Create Custom Activity on Close:</h3>
-        <pre>{json.dumps(delivery_information, indent=2, default=str)}</pre>
+        <pre>{json.dumps(asdict(delivery_information), indent=2, default=str)}</pre>
 
         <h3>Error:</h3>
         <pre>{str(error)}</pre>
         """
-    send_email(
+    send_email_in_background(
         subject="Update Delivery Status: Creation of Custom Activity Failed",
         body=detailed_error_message,
     )
@@ -10,6 +10,8 @@ ensuring that:
 5. Backward compatibility is maintained
 """
 
+import json
+import orjson
 import pytest
 from unittest.mock import Mock, patch
 import requests
@@ -19,7 +21,9 @@ from close_utils import (
     make_close_request,
     get_close_rate_limiter,
     close_rate_limit,
+    retry_with_backoff,
     search_close_leads,
+    iter_close_leads,
     get_lead_by_id,
 )
 
@@ -244,6 +248,26 @@ class TestCloseUtilsIntegration:
         # Verify no retries for 4xx errors
         assert mock_request.call_count == 1
 
+    @patch("requests.request")
+    def test_retry_with_backoff_no_retry_on_4xx(self, mock_request):
+        """Test retry_with_backoff doesn't retry on 4xx errors (except 429)."""
+        # Mock 422 error
+        mock_response = Mock()
+        mock_response.status_code = 422
+        mock_error = requests.exceptions.HTTPError("422 Unprocessable Entity")
+        mock_error.response = mock_response
+        mock_request.side_effect = mock_error
+
+        @retry_with_backoff(max_retries=2, initial_delay=0.01)
+        def test_function(method, url, **kwargs):
+            return requests.request(method, url, **kwargs)
+
+        with pytest.raises(requests.exceptions.HTTPError):
+            test_function("GET", "https://api.close.com/api/v1/me/")
+
+        # Verify no retries for 4xx errors
+        assert mock_request.call_count == 1
+
     @patch("close_utils.make_close_request")
     def test_make_close_request_integration(self, mock_make_request):
         """Test that make_close_request uses the new decorator."""
@@ -268,7 +292,9 @@ class TestCloseUtilsIntegration:
         """Test search_close_leads integration with rate limiting."""
         # Mock response
         mock_response = Mock()
-        mock_response.json.return_value = {"data": [{"id": "lead_123"}], "cursor": None}
+        mock_response.content = json.dumps(
+            {"data": [{"id": "lead_123"}], "cursor": None}
+        ).encode()
         mock_make_request.return_value = mock_response
 
         # Test query
@@ -279,12 +305,75 @@ class TestCloseUtilsIntegration:
 
         # Verify the function was called with rate limiting
         mock_make_request.assert_called_once_with(
-            "post", "https://api.close.com/api/v1/data/search/", json=query, timeout=30
+            "post",
+            "https://api.close.com/api/v1/data/search/",
+            data=orjson.dumps({**query, "_limit": 200}),
+            timeout=30,
         )
 
         # Verify result
         assert result == [{"id": "lead_123"}]
 
+    @patch("close_utils.make_close_request")
+    def test_iter_close_leads_yields_across_pages(self, mock_make_request):
+        """Test iter_close_leads follows the cursor and yields leads lazily."""
+        first_page = Mock()
+        first_page.content = json.dumps(
+            {"data": [{"id": "lead_1"}], "cursor": "c1"}
+        ).encode()
+        second_page = Mock()
+        second_page.content = json.dumps(
+            {"data": [{"id": "lead_2"}], "cursor": None}
+        ).encode()
+        mock_make_request.side_effect = [first_page, second_page]
+
+        leads = iter_close_leads({"query": {"queries": []}})
+
+        # Nothing is fetched until the iterator is consumed
+        mock_make_request.assert_not_called()
+        assert next(leads) == {"id": "lead_1"}
+        assert mock_make_request.call_count == 1
+        assert list(leads) == [{"id": "lead_2"}]
+        assert mock_make_request.call_count == 2
+
+        # Only the second page carries the cursor
+        first_body = mock_make_request.call_args_list[0].kwargs["data"]
+        second_body = mock_make_request.call_args_list[1].kwargs["data"]
+        assert json.loads(first_body) == {"query": {"queries": []}, "_limit": 200}
+        assert json.loads(second_body) == {
+            "query": {"queries": []},
+            "_limit": 200,
+            "cursor": "c1",
+        }
+
+    @patch("close_utils.make_close_request")
+    def test_iter_close_leads_keeps_query_page_size(self, mock_make_request):
+        """Test iter_close_leads leaves an explicit _limit alone."""
+        mock_response = Mock()
+        mock_response.content = json.dumps({"data": [], "cursor": None}).encode()
+        mock_make_request.return_value = mock_response
+
+        query = {"query": {"queries": []}, "_limit": 5}
+        list(iter_close_leads(query))
+
+        body = mock_make_request.call_args.kwargs["data"]
+        assert json.loads(body) == {"query": {"queries": []}, "_limit": 5}
+
+    @patch("close_utils.make_close_request")
+    def test_iter_close_leads_replaces_query_cursor(self, mock_make_request):
+        """Test later pages send the page cursor, not a cursor from the query."""
+        first_page = Mock()
+        first_page.content = json.dumps({"data": [], "cursor": "c1"}).encode()
+        second_page = Mock()
+        second_page.content = json.dumps({"data": [], "cursor": None}).encode()
+        mock_make_request.side_effect = [first_page, second_page]
+
+        list(iter_close_leads({"cursor": "stale"}))
+
+        second_body = mock_make_request.call_args_list[1].kwargs["data"]
+        assert second_body.count(b'"cursor"') == 1
+        assert json.loads(second_body) == {"_limit": 200, "cursor": "c1"}
+
     @patch("close_utils.get_close_rate_limiter")
     def test_rate_limiter_header_parsing_integration(self, mock_get_limiter):
         """Test that response headers are parsed and cached."""
@@ -294,7 +383,7 @@ class TestCloseUtilsIntegration:
         mock_get_limiter.return_value = mock_rate_limiter
 
         # Mock response with rate limit headers
-        with patch("requests.request") as mock_request:
+        with patch("close_utils._close_session.request") as mock_request:
             mock_response = Mock()
             mock_response.headers = {"ratelimit": "limit=160; remaining=159; reset=8"}
             mock_response.raise_for_status.return_value = None
@@ -312,6 +401,131 @@ class TestCloseUtilsIntegration:
             # Verify result
             assert result == mock_response
 
+    def _blocking_close_session(self, fail_first=False):
+        """
+        Patch the Close session with a request that holds the first call
+        open until released, and record every call that reaches it.
+        """
+        import threading
+
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def request(method, url, **kwargs):
+            calls.append((method, url, kwargs))
+            response = requests.Response()
+            response.status_code = 200
+            if len(calls) == 1:
+                started.set()
+                release.wait(timeout=5)
+                if fail_first:
+                    response.status_code = 404
+            response._content = json.dumps({"call": len(calls)}).encode()
+            return response
+
+        mock_limiter = Mock()
+        mock_limiter.acquire_token_for_endpoint.return_value = True
+        patches = (
+            patch("close_utils._close_session.request", side_effect=request),
+            patch("close_utils.get_close_rate_limiter", return_value=mock_limiter),
+        )
+        return patches, started, release, calls
+
+    def _run_behind_first_request(self, first, others, fail_first=False):
+        """
+        Send the first request, then the others from concurrent threads while
+        it is still in flight. Returns the results (or exceptions) of all of
+        them and the calls that reached the Close session.
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait
+
+        patches, started, release, calls = self._blocking_close_session(fail_first)
+        with patches[0], patches[1], ThreadPoolExecutor(
+            max_workers=len(others) + 1
+        ) as executor:
+            leader = executor.submit(make_close_request, *first[0], **first[1])
+            assert started.wait(timeout=5)
+            followers = [
+                executor.submit(make_close_request, *args, **kwargs)
+                for args, kwargs in others
+            ]
+            # Give the followers time to reach the in-flight request
+            wait(followers, timeout=0.5)
+            release.set()
+            wait([leader, *followers], timeout=5)
+
+        results = [f.exception() or f.result() for f in [leader, *followers]]
+        return results, calls
+
+    def test_coalesce_concurrent_gets_shares_one_request(self):
+        """Test concurrent identical GETs send one request to Close."""
+        url = "https://api.close.com/api/v1/lead/lead_123/"
+        request = (("get", url), {"params": {"b": 2, "a": 1}, "timeout": 30})
+        same_params_reordered = (("get", url), {"params": {"a": 1, "b": 2}})
+
+        results, calls = self._run_behind_first_request(
+            request, [request, request, same_params_reordered]
+        )
+
+        assert len(calls) == 1
+        assert all(response.json() == {"call": 1} for response in results)
+        # Every caller gets its own response object
+        assert len({id(response) for response in results}) == len(results)
+        results[1].headers["X-Changed"] = "1"
+        assert "X-Changed" not in results[0].headers
+
+        # Once the request has finished, the next GET goes out again
+        with patch("close_utils._close_session.request") as mock_request, patch(
+            "close_utils.get_close_rate_limiter"
+        ):
+            make_close_request("get", url)
+        assert mock_request.call_count == 1
+
+    def test_coalesce_concurrent_gets_only_plain_matching_gets(self):
+        """Test GETs with other params, headers or methods are not coalesced."""
+        url = "https://api.close.com/api/v1/lead/lead_123/"
+
+        results, calls = self._run_behind_first_request(
+            (("get", url), {"params": {"_fields": "id"}}),
+            [
+                (("get", url), {"params": {"_fields": "name"}}),
+                (("get", url), {"params": {"_fields": "id"}, "headers": {"X": "1"}}),
+                (("put", url), {"json": {}}),
+            ],
+        )
+
+        assert len(calls) == 4
+        assert all(response.status_code == 200 for response in results)
+
+    def test_coalesce_concurrent_gets_failure_is_not_shared(self):
+        """Test waiters send their own request when the shared one fails."""
+        url = "https://api.close.com/api/v1/lead/lead_123/"
+        request = (("get", url), {})
+
+        results, calls = self._run_behind_first_request(
+            request, [request, request], fail_first=True
+        )
+
+        assert isinstance(results[0], requests.exceptions.HTTPError)
+        assert all(response.status_code == 200 for response in results[1:])
+        assert len(calls) == 3
+
+    def test_create_email_search_query_sets_email(self):
+        """Test the email lands in the contact email condition of a fresh query."""
+        from close_utils import create_email_search_query
+
+        query = create_email_search_query("first@example.com")
+        query["limit"] = 5
+        other = create_email_search_query("second@example.com")
+
+        condition = other["query"]["queries"][1]["queries"][0]["related_query"][
+            "queries"
+        ][0]["related_query"]["queries"][0]["condition"]
+        assert condition["value"] == "second@example.com"
+        # Each call returns an independent query
+        assert other["limit"] is None
+
     def test_backward_compatibility(self):
         """Test that existing functionality remains unchanged."""
         # Test that all original functions still exist and are callable
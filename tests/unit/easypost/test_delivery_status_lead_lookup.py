@@ -0,0 +1,168 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from temporal.activities.easypost import (
+    webhook_create_tracker,
+    webhook_delivery_status,
+)
+from utils.easypost import CLOSE_TRACKING_NUMBER_FIELD_ID
+
+TRACKING_CODE = "EZ1000000001"
+MODULE = "temporal.activities.easypost.webhook_delivery_status"
+CREATE_TRACKER_MODULE = "temporal.activities.easypost.webhook_create_tracker"
+
+
+@pytest.fixture
+def mapped_lead():
+    """Tracking number map pointing at lead_1, with patched Close lookups."""
+    with patch(
+        f"{MODULE}.get_lead_id_for_tracking_number", return_value="lead_1"
+    ), patch(f"{MODULE}.get_lead_by_id") as mock_get_lead, patch(
+        f"{MODULE}._search_leads_by_tracking_code"
+    ) as mock_search:
+        mock_get_lead.return_value = {
+            "id": "lead_1",
+            CLOSE_TRACKING_NUMBER_FIELD_ID: TRACKING_CODE,
+        }
+        mock_search.return_value = [{"id": "lead_1"}]
+        yield mock_get_lead, mock_search
+
+
+def test_map_hit_returns_mapped_lead_without_search(mapped_lead):
+    mock_get_lead, mock_search = mapped_lead
+
+    lead_id = webhook_delivery_status._lead_id_from_tracking_number_map(
+        TRACKING_CODE
+    )
+
+    assert lead_id == "lead_1"
+    mock_get_lead.assert_called_once_with("lead_1")
+    mock_search.assert_not_called()
+
+
+def test_map_miss_falls_back():
+    with patch(f"{MODULE}.get_lead_id_for_tracking_number", return_value=None):
+        assert (
+            webhook_delivery_status._lead_id_from_tracking_number_map(TRACKING_CODE)
+            is None
+        )
+
+
+def test_stale_mapped_lead_falls_back(mapped_lead):
+    mock_get_lead, _ = mapped_lead
+    mock_get_lead.return_value = None
+
+    assert (
+        webhook_delivery_status._lead_id_from_tracking_number_map(TRACKING_CODE)
+        is None
+    )
+
+
+def test_mismatched_tracking_field_falls_back(mapped_lead):
+    mock_get_lead, _ = mapped_lead
+    mock_get_lead.return_value = {
+        "id": "lead_1",
+        CLOSE_TRACKING_NUMBER_FIELD_ID: "EZ2000000002",
+    }
+
+    assert (
+        webhook_delivery_status._lead_id_from_tracking_number_map(TRACKING_CODE)
+        is None
+    )
+
+
+def _activity_input():
+    return webhook_delivery_status.UpdateDeliveryInfoInput(
+        tracking_code=TRACKING_CODE,
+        last_tracking_detail=webhook_delivery_status.TrackingDetail.new(
+            city="austin", state="tx", datetime="2023-12-18T15:04:05Z"
+        ),
+    )
+
+
+def test_activity_updates_mapped_lead(mapped_lead):
+    _, mock_search = mapped_lead
+    with patch(f"{MODULE}.update_delivery_information_for_lead") as mock_update:
+        result = webhook_delivery_status.update_delivery_info_for_lead_activity(
+            _activity_input()
+        )
+
+    assert result.lead_id == "lead_1"
+    assert mock_update.call_args.args[0] == "lead_1"
+    mock_search.assert_not_called()
+
+
+def test_activity_reports_multiple_leads_on_map_miss(mapped_lead):
+    mock_get_lead, mock_search = mapped_lead
+    mock_search.return_value = [{"id": "lead_1"}, {"id": "lead_2"}]
+
+    with patch(
+        f"{MODULE}.get_lead_id_for_tracking_number", return_value=None
+    ), patch(f"{MODULE}.is_last_attempt", return_value=False), patch(
+        f"{MODULE}.activity"
+    ), patch(f"{MODULE}.update_delivery_information_for_lead") as mock_update:
+        with pytest.raises(ValueError, match="Multiple valid leads"):
+            webhook_delivery_status.update_delivery_info_for_lead_activity(
+                _activity_input()
+            )
+
+    mock_update.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    ("close_leads", "remembered"),
+    [
+        ([{"id": "lead_1"}], True),
+        # The search index may not have the lead yet
+        ([], True),
+        ([{"id": "lead_1"}, {"id": "lead_2"}], False),
+    ],
+)
+def test_create_tracker_remembers_only_unshared_tracking_numbers(
+    close_leads, remembered
+):
+    with patch(
+        f"{CREATE_TRACKER_MODULE}.search_leads_by_tracking_number",
+        return_value=close_leads,
+    ), patch(
+        f"{CREATE_TRACKER_MODULE}.remember_lead_for_tracking_number"
+    ) as mock_remember:
+        webhook_create_tracker._remember_lead_if_unique(TRACKING_CODE, "lead_1")
+
+    assert mock_remember.called is remembered
+
+
+def test_create_tracker_skips_map_when_search_fails():
+    with patch(
+        f"{CREATE_TRACKER_MODULE}.search_leads_by_tracking_number",
+        side_effect=RuntimeError("close down"),
+    ), patch(
+        f"{CREATE_TRACKER_MODULE}.remember_lead_for_tracking_number"
+    ) as mock_remember:
+        webhook_create_tracker._remember_lead_if_unique(TRACKING_CODE, "lead_1")
+
+    mock_remember.assert_not_called()
+
+
+def test_create_tracker_reuses_tracker_only_for_the_same_lead():
+    cache = {}
+    client = Mock()
+    client.tracker.create.side_effect = [Mock(id="trk_1"), Mock(id="trk_2")]
+
+    with patch(
+        f"{CREATE_TRACKER_MODULE}.get_from_cache", side_effect=cache.get
+    ), patch(
+        f"{CREATE_TRACKER_MODULE}.set_to_cache",
+        side_effect=lambda key, value, seconds: cache.__setitem__(key, value),
+    ), patch(
+        f"{CREATE_TRACKER_MODULE}.get_easypost_client", return_value=client
+    ):
+        first = webhook_create_tracker._create_tracker("lead_1", TRACKING_CODE, "USPS")
+        retry = webhook_create_tracker._create_tracker("lead_1", TRACKING_CODE, "USPS")
+        other_lead = webhook_create_tracker._create_tracker(
+            "lead_2", TRACKING_CODE, "USPS"
+        )
+
+    assert (first, retry, other_lead) == ("trk_1", "trk_1", "trk_2")
+    assert client.tracker.create.call_count == 2
@@ -0,0 +1,21 @@
+from temporalio.contrib.pydantic import pydantic_data_converter
+
+from temporal.activities.easypost.webhook_delivery_status import (
+    TrackingDetail,
+    UpdateDeliveryInfoResult,
+)
+
+
+def test_constructed_models_round_trip_through_data_converter():
+    """Models built with model_construct must still serialize for Temporal."""
+    values = [
+        TrackingDetail.new(city="austin", state="tx", datetime="2023-12-18T15:04:05Z"),
+        UpdateDeliveryInfoResult.model_construct(lead_id="lead_123"),
+    ]
+    converter = pydantic_data_converter.payload_converter
+
+    payloads = converter.to_payloads(values)
+
+    assert converter.from_payloads(
+        payloads, [TrackingDetail, UpdateDeliveryInfoResult]
+    ) == values
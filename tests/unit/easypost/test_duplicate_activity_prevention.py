@@ -6,7 +6,11 @@ from unittest.mock import Mock, patch
 from datetime import datetime
 import requests
 
-from utils.easypost import _check_existing_mailer_delivered_activities
+from close_utils import DeliveryInformation
+from utils.easypost import (
+    _check_existing_mailer_delivered_activities,
+    create_package_delivered_custom_activity_in_close,
+)
 
 
 class TestDuplicateActivityPrevention:
@@ -15,14 +19,14 @@ class TestDuplicateActivityPrevention:
     def setup_method(self):
         """Setup test data before each test."""
         self.test_lead_id = "lead_test123"
-        self.test_delivery_information = {
-            "date_and_location_of_mailer_delivered": "Mon 12/18 to Austin, TX",
-            "delivery_state": "TX",
-            "delivery_city": "Austin",
-            "delivery_date": datetime.strptime("2023-12-18", "%Y-%m-%d").date(),
-            "delivery_date_readable": "Mon 12/18",
-            "location_delivered": "Austin, TX",
-        }
+        self.test_delivery_information = DeliveryInformation(
+            date_and_location_of_mailer_delivered="Mon 12/18 to Austin, TX",
+            delivery_state="TX",
+            delivery_city="Austin",
+            delivery_date=datetime.strptime("2023-12-18", "%Y-%m-%d").date(),
+            delivery_date_readable="Mon 12/18",
+            location_delivered="Austin, TX",
+        )
 
     @patch("utils.easypost.make_close_request")
     def test_check_existing_activities_api_call(self, mock_make_request):
@@ -107,3 +111,30 @@ class TestDuplicateActivityPrevention:
 
         # Verify error was logged
         mock_logger.error.assert_called()
+
+    @patch("utils.easypost._check_existing_mailer_delivered_activities")
+    @patch("utils.easypost.make_close_request")
+    def test_create_activity_uses_delivery_information_fields(
+        self, mock_make_request, mock_check_existing
+    ):
+        """Test that the activity payload is built from DeliveryInformation."""
+        mock_check_existing.return_value = False
+        mock_response = Mock()
+        mock_response.json.return_value = {"id": "acti_123"}
+        mock_make_request.return_value = mock_response
+
+        result = create_package_delivered_custom_activity_in_close(
+            self.test_lead_id, self.test_delivery_information
+        )
+
+        assert result == {"id": "acti_123"}
+        payload = mock_make_request.call_args.kwargs["json"]
+        assert payload["lead_id"] == self.test_lead_id
+        assert (
+            payload["custom.cf_wS7icPETKthDz764rkbuC1kQYzP0l88CzlMxoJAlOkO"]
+            == "2023-12-18"
+        )
+        assert (
+            payload["custom.cf_Wzp0dZ2D8PQTCKUiKMGsYUVDnURtisF6g9Lwz72WM8m"]
+            == "Austin, TX"
+        )
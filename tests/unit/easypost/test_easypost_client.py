@@ -0,0 +1,16 @@
+import utils.easypost
+from utils.easypost import get_easypost_client
+
+
+def test_get_easypost_client_reuses_client_per_api_key(monkeypatch):
+    monkeypatch.setattr(utils.easypost, "EASYPOST_PROD_API_KEY", "prod_key")
+    monkeypatch.setattr(utils.easypost, "EASYPOST_TEST_API_KEY", "test_key")
+
+    prod_client = get_easypost_client("9400111899223197428490")
+    test_client = get_easypost_client("EZ1000000001")
+
+    assert prod_client.api_key == "prod_key"
+    assert test_client.api_key == "test_key"
+    assert get_easypost_client("1Z999AA10123456784") is prod_client
+    assert get_easypost_client() is prod_client
+    assert get_easypost_client("ez2000000002") is test_client
@@ -0,0 +1,56 @@
+"""
+Unit tests for listing Close webhooks in the production webhook verifier.
+"""
+
+import orjson
+from unittest.mock import Mock, patch
+
+from scripts.verify_production_webhooks import CloseAPI
+
+
+def _page(webhooks, has_more):
+    response = Mock()
+    response.status_code = 200
+    response.content = orjson.dumps({"data": webhooks, "has_more": has_more})
+    return response
+
+
+class TestCloseListWebhooks:
+    """Test that Close webhooks are listed across every page."""
+
+    def test_follows_skip_until_has_more_is_false(self):
+        """Test the second page is requested with _skip and included."""
+        first_page = [{"id": "whsub_1"}, {"id": "whsub_2"}]
+        second_page = [{"id": "whsub_3"}]
+
+        with CloseAPI("test_api_key") as close_api, patch.object(
+            close_api.session, "get"
+        ) as mock_get:
+            requested_params = []
+            responses = iter([_page(first_page, True), _page(second_page, False)])
+
+            def get(url, params):
+                requested_params.append(dict(params))
+                return next(responses)
+
+            mock_get.side_effect = get
+            webhooks = close_api.list_webhooks()
+
+        assert webhooks == first_page + second_page
+        assert requested_params == [
+            {"_limit": 100, "_skip": 0},
+            {"_limit": 100, "_skip": 2},
+        ]
+
+    def test_returns_none_when_a_page_fails(self):
+        """Test a failed page is reported instead of returning a partial list."""
+        failed = Mock()
+        failed.status_code = 500
+        failed.text = "server error"
+
+        responses = [_page([{"id": "whsub_1"}], True), failed]
+
+        with CloseAPI("test_api_key") as close_api, patch.object(
+            close_api.session, "get", side_effect=responses
+        ):
+            assert close_api.list_webhooks() is None
@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.easypost import format_delivery_date_readable, parse_tracking_datetime
+
+
+@pytest.mark.parametrize(
+    "value, expected_output",
+    [
+        ("2023-12-18T15:04:05Z", datetime(2023, 12, 18, 15, 4, 5)),
+        ("2024-02-29T00:00:00Z", datetime(2024, 2, 29, 0, 0, 0)),
+    ],
+)
+def test_parse_tracking_datetime(value: str, expected_output: datetime) -> None:
+    assert parse_tracking_datetime(value) == expected_output
+
+
+@pytest.mark.parametrize(
+    "value", ["2023-12-18", "2023-12-18T15:04:05+00:00", "2023-13-18T15:04:05Z"]
+)
+def test_parse_tracking_datetime_rejects_other_formats(value: str) -> None:
+    with pytest.raises(ValueError):
+        parse_tracking_datetime(value)
+
+
+def test_format_delivery_date_readable_matches_strftime() -> None:
+    start = datetime(2023, 12, 18, 15, 4, 5)
+    for days in range(14):
+        value = start + timedelta(days=days)
+        assert format_delivery_date_readable(value) == value.strftime("%a %-m/%-d")
@@ -0,0 +1,99 @@
+import threading
+from concurrent.futures import Future
+from unittest.mock import patch
+
+import utils.email
+from utils.email import send_email_coalesced, send_email_in_background
+
+
+def test_send_email_in_background_sends_on_worker_thread() -> None:
+    with patch.object(utils.email, "send_email") as mock_send:
+        mock_send.return_value = {"status": "success"}
+        future = send_email_in_background(subject="Subject", body="<p>Body</p>")
+
+        assert future.result(timeout=5) == {"status": "success"}
+    mock_send.assert_called_once_with("Subject", "<p>Body</p>")
+
+
+def test_log_send_failure_logs_exception() -> None:
+    future: Future = Future()
+    future.set_exception(RuntimeError("gmail down"))
+
+    with patch.object(utils.email, "logger") as mock_logger:
+        utils.email._log_send_failure(future)
+
+    mock_logger.error.assert_called_once_with("send_email_failed", error="gmail down")
+
+
+def test_send_email_coalesced_merges_repeats_into_one_digest() -> None:
+    with patch.object(utils.email.threading, "Timer") as mock_timer, patch.object(
+        utils.email, "send_email"
+    ) as mock_send:
+        for n in range(3):
+            send_email_coalesced(subject="No Leads Found", body=f"<p>{n}</p>")
+
+        # Only the first email opens a window; the rest are buffered
+        mock_timer.assert_called_once()
+        mock_send.assert_not_called()
+
+        # Close the window the way the timer would
+        window_seconds = mock_timer.call_args.args[0]
+        utils.email._send_coalesced_email(*mock_timer.call_args.kwargs["args"])
+
+    assert window_seconds == 60
+    mock_send.assert_called_once()
+    assert mock_send.call_args.kwargs["subject"] == (
+        "No Leads Found (3 occurrences in 60s)"
+    )
+    body = mock_send.call_args.kwargs["body"]
+    assert "<p>0</p><hr><p>1</p><hr><p>2</p>" in body
+
+
+def test_send_email_coalesced_sends_single_email_unchanged() -> None:
+    with patch.object(utils.email.threading, "Timer") as mock_timer, patch.object(
+        utils.email, "send_email"
+    ) as mock_send:
+        send_email_coalesced(subject="Lead Not Found", body="<p>only</p>")
+        utils.email._send_coalesced_email(*mock_timer.call_args.kwargs["args"])
+
+    mock_send.assert_called_once_with(subject="Lead Not Found", body="<p>only</p>")
+
+
+def test_send_email_coalesced_counts_and_caps_samples() -> None:
+    sent = threading.Event()
+    with patch.object(utils.email, "send_email") as mock_send:
+        mock_send.side_effect = lambda **kwargs: sent.set()
+        for n in range(12):
+            send_email_coalesced(
+                subject="Tracker Failed", body=f"<p>{n}</p>", window_seconds=0.05
+            )
+
+        assert sent.wait(timeout=5)
+
+    mock_send.assert_called_once()
+    assert mock_send.call_args.kwargs["subject"] == (
+        "Tracker Failed (12 occurrences in 0.05s)"
+    )
+    body = mock_send.call_args.kwargs["body"]
+    assert "showing the first 10" in body
+    assert "<p>9</p>" in body
+    assert "<p>10</p>" not in body
+    assert body.count("<hr>") == 9
+
+
+def test_flush_coalesced_emails_sends_pending_digests() -> None:
+    with patch.object(utils.email.threading, "Timer") as mock_timer, patch.object(
+        utils.email, "send_email"
+    ) as mock_send:
+        send_email_coalesced(subject="Lead Not Found", body="<p>a</p>")
+        send_email_coalesced(subject="Lead Not Found", body="<p>b</p>")
+
+        utils.email._flush_coalesced_emails()
+        # The window closing afterwards finds nothing left to send
+        utils.email._send_coalesced_email(*mock_timer.call_args.kwargs["args"])
+
+    assert mock_timer.return_value.daemon is True
+    mock_send.assert_called_once()
+    assert mock_send.call_args.kwargs["subject"] == (
+        "Lead Not Found (2 occurrences in 60s)"
+    )
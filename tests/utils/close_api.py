@@ -313,6 +313,24 @@ class CloseAPI:
 
         return True
 
+    def delete_lead_if_exists(self, lead_id):
+        """
+        Delete a lead from Close, treating an already-deleted lead as a no-op.
+
+        Returns:
+            bool: True if the lead was deleted, False if it no longer existed
+        """
+        response = self._make_request_with_retry(
+            "DELETE", f"{self.base_url}/lead/{lead_id}/", headers=self.headers
+        )
+
+        if response.status_code == 404:
+            return False
+        if response.status_code != 200:
+            raise Exception(f"Failed to delete lead: {response.text}")
+
+        return True
+
     def delete_webhook(self, webhook_id):
         """Delete a webhook from Close."""
         response = self._make_request_with_retry(
@@ -1,10 +1,18 @@
+import functools
 import os
+from datetime import datetime
 from typing import Any
 
 import easypost
 import structlog
 
-from close_utils import make_close_request
+from close_utils import (
+    DeliveryInformation,
+    load_query,
+    make_close_request,
+    search_close_leads,
+)
+from utils.redis import get_from_cache, set_to_cache
 
 
 # Configure logging using structlog
@@ -13,6 +21,76 @@ logger = structlog.get_logger("easypost")
 EASYPOST_PROD_API_KEY = os.environ.get("EASYPOST_PROD_API_KEY")
 EASYPOST_TEST_API_KEY = os.environ.get("EASYPOST_TEST_API_KEY")
 
+TRACKING_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Close lead custom field holding the package tracking number
+CLOSE_TRACKING_NUMBER_FIELD_ID = "custom.cf_iSOPYKzS9IPK20gJ8eH9Q74NT7grCQW9psqo4lZR3Ii"
+
+# How long the tracking number -> lead mapping is kept; packages are delivered
+# well within this window
+TRACKING_NUMBER_LEAD_CACHE_SECONDS = 30 * 24 * 60 * 60
+
+
+def parse_tracking_datetime(value: str) -> datetime:
+    """
+    Parse an EasyPost tracking detail timestamp, e.g. "2024-01-02T03:04:05Z".
+
+    Timestamps in the expected UTC "Z" form go through datetime.fromisoformat,
+    which is much cheaper than strptime; anything else falls back to strptime
+    with TRACKING_DATETIME_FORMAT. The result is naive, as with strptime.
+    """
+    if len(value) == 20 and value.endswith("Z"):
+        try:
+            return datetime.fromisoformat(value[:-1])
+        except ValueError:
+            pass
+    return datetime.strptime(value, TRACKING_DATETIME_FORMAT)
+
+
+_WEEKDAY_ABBREVIATIONS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+def format_delivery_date_readable(value: datetime) -> str:
+    """
+    Format a delivery date as e.g. "Mon 12/18".
+
+    Same output as strftime("%a %-m/%-d") in the C locale, without going
+    through strftime or relying on the glibc-only "%-" flag.
+    """
+    return f"{_WEEKDAY_ABBREVIATIONS[value.weekday()]} {value.month}/{value.day}"
+
+
+def search_leads_by_tracking_number(tracking_number):
+    """Search Close for the leads whose tracking number field matches."""
+    query = load_query("lead_by_tracking_number.json")
+    query["query"]["queries"][1]["queries"][0]["queries"][0]["condition"][
+        "value"
+    ] = tracking_number
+    return search_close_leads(query)
+
+
+def _tracking_number_lead_key(tracking_number):
+    return f"easypost:tracking:{tracking_number}"
+
+
+def remember_lead_for_tracking_number(tracking_number, lead_id):
+    """
+    Record which Close lead a tracking number belongs to.
+
+    The delivery-status webhook trusts this lead without searching Close, so
+    only record tracking numbers that no other lead carries.
+    """
+    set_to_cache(
+        _tracking_number_lead_key(tracking_number),
+        lead_id,
+        TRACKING_NUMBER_LEAD_CACHE_SECONDS,
+    )
+
+
+def get_lead_id_for_tracking_number(tracking_number):
+    """Return the lead recorded for a tracking number, or None if unknown."""
+    return get_from_cache(_tracking_number_lead_key(tracking_number))
+
 
 # EasyPost client setup
 def get_easypost_client(tracking_number=None):
@@ -50,10 +128,23 @@ def get_easypost_client(tracking_number=None):
             f"Using EasyPost production API key for tracking number: {tracking_number}"
         )
 
+    return _easypost_client_for_key(api_key)
+
+
+@functools.lru_cache(maxsize=4)
+def _easypost_client_for_key(api_key):
+    """
+    Return the EasyPost client for an API key, creating it on first use.
+
+    Each client owns a requests session, so reusing one client per key keeps
+    its connections to EasyPost alive across activity runs.
+    """
     return easypost.EasyPostClient(api_key=api_key)
 
 
-def create_package_delivered_custom_activity_in_close(lead_id, delivery_information) -> dict[str, Any]:
+def create_package_delivered_custom_activity_in_close(
+    lead_id, delivery_information: DeliveryInformation
+) -> dict[str, Any]:
     """Create a custom activity in Close for delivered package."""
     # Check if there are already existing mailer delivered activities for this lead
     if _check_existing_mailer_delivered_activities(lead_id):
@@ -93,22 +184,22 @@ def create_package_delivered_custom_activity_in_close(lead_id, delivery_informat
         "custom_activity_type_id": "custom.actitype_3KhBfWgjtVfiGYbczbgOWv",  # Activity Type: Mailer Delivered
         custom_activity_field_ids["date_and_location_of_mailer_delivered"][
             "value"
-        ]: delivery_information["date_and_location_of_mailer_delivered"],
-        custom_activity_field_ids["state_delivered"]["value"]: delivery_information[
-            "delivery_state"
-        ],
-        custom_activity_field_ids["city_delivered"]["value"]: delivery_information[
-            "delivery_city"
-        ],
-        custom_activity_field_ids["date_delivered"]["value"]: delivery_information[
-            "delivery_date"
-        ].isoformat(),
+        ]: delivery_information.date_and_location_of_mailer_delivered,
+        custom_activity_field_ids["state_delivered"][
+            "value"
+        ]: delivery_information.delivery_state,
+        custom_activity_field_ids["city_delivered"][
+            "value"
+        ]: delivery_information.delivery_city,
+        custom_activity_field_ids["date_delivered"][
+            "value"
+        ]: delivery_information.delivery_date.isoformat(),
         custom_activity_field_ids["date_delivered_readable"][
             "value"
-        ]: delivery_information["delivery_date_readable"],
-        custom_activity_field_ids["location_delivered"]["value"]: delivery_information[
-            "location_delivered"
-        ],
+        ]: delivery_information.delivery_date_readable,
+        custom_activity_field_ids["location_delivered"][
+            "value"
+        ]: delivery_information.location_delivered,
     }
 
     response = make_close_request(
@@ -1,8 +1,29 @@
+import atexit
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any
 from config import ERROR_EMAIL_RECIPIENTS, env_type
 import pytz
+import structlog
 from datetime import datetime
 
+logger = structlog.get_logger("email")
+
+# Background senders for error emails, so a failing activity can raise without
+# waiting on the Gmail API. Threads are non-daemon, so queued emails still go
+# out when the worker shuts down.
+_email_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="send_email")
+
+# How many of the buffered bodies a coalesced digest email includes
+COALESCED_EMAIL_SAMPLE_SIZE = 10
+
+# Bodies buffered by send_email_coalesced, per key, until their window closes
+_coalesced_bodies: dict[str, list[str]] = {}
+# Subject and window of each key with an open window, so pending digests can
+# be flushed at exit
+_coalesced_windows: dict[str, tuple[str, float]] = {}
+_coalesced_lock = threading.Lock()
+
 
 def send_email(subject: str, body: str, **kwargs: str) -> dict[str, Any]:
     """
@@ -63,3 +84,83 @@ def send_email(subject: str, body: str, **kwargs: str) -> dict[str, Any]:
     )
 
     return gmail_response
+
+
+def send_email_in_background(subject: str, body: str, **kwargs: str) -> Future:
+    """
+    Queue send_email on a background thread and return its future.
+
+    Takes the same arguments as send_email. Failures are logged rather than
+    raised, since nobody waits on the result.
+    """
+    future = _email_executor.submit(send_email, subject, body, **kwargs)
+    future.add_done_callback(_log_send_failure)
+    return future
+
+
+def _log_send_failure(future: Future) -> None:
+    exc = future.exception()
+    if exc is not None:
+        logger.error("send_email_failed", error=str(exc))
+
+
+def send_email_coalesced(
+    subject: str, body: str, key: str | None = None, window_seconds: float = 60
+) -> None:
+    """
+    Send an error email, merging repeats of the same error into one digest.
+
+    The first email for a key opens a window of window_seconds; every email
+    with that key sent before the window closes is buffered, then a single
+    email goes out. When several were buffered it carries the occurrence
+    count and the first COALESCED_EMAIL_SAMPLE_SIZE bodies. The key defaults
+    to the subject.
+    """
+    key = key or subject
+    with _coalesced_lock:
+        bodies = _coalesced_bodies.setdefault(key, [])
+        bodies.append(body)
+        if len(bodies) > 1:
+            return
+        _coalesced_windows[key] = (subject, window_seconds)
+
+    # Daemon, so an open window never holds up shutdown; _flush_coalesced_emails
+    # sends whatever is still buffered at exit
+    timer = threading.Timer(
+        window_seconds, _send_coalesced_email, args=(key, subject, window_seconds)
+    )
+    timer.daemon = True
+    timer.start()
+
+
+def _send_coalesced_email(key: str, subject: str, window_seconds: float) -> None:
+    with _coalesced_lock:
+        bodies = _coalesced_bodies.pop(key, [])
+        _coalesced_windows.pop(key, None)
+    if not bodies:
+        return
+
+    if len(bodies) > 1:
+        samples = bodies[:COALESCED_EMAIL_SAMPLE_SIZE]
+        subject = f"{subject} ({len(bodies)} occurrences in {window_seconds:g}s)"
+        body = (
+            f"<p><strong>{len(bodies)} occurrences in the last "
+            f"{window_seconds:g} seconds; showing the first {len(samples)}.</strong></p>"
+            + "<hr>".join(samples)
+        )
+    else:
+        body = bodies[0]
+
+    try:
+        send_email(subject=subject, body=body)
+    except Exception as e:
+        logger.error("send_email_failed", error=str(e))
+
+
+@atexit.register
+def _flush_coalesced_emails() -> None:
+    """Send every digest whose window is still open."""
+    with _coalesced_lock:
+        pending = list(_coalesced_windows.items())
+    for key, (subject, window_seconds) in pending:
+        _send_coalesced_email(key, subject, window_seconds)
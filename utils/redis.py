@@ -31,4 +31,4 @@ def set_to_cache(key, value, expiration_seconds=600):
         try:
             client.setex(key, expiration_seconds, json.dumps(value))
         except Exception as e:
-            logger.warning(f"Failed to set cache for {key}: {e}")
\ No newline at end of file
+            logger.warning(f"Failed to set cache for {key}: {e}")